@@ -0,0 +1,224 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Micro-benchmark for the gesture classifiers: every classifier is driven with 1,
+# 10, ... up to 10^6 hands, one call per hand, and the per-call latency distribution
+# and throughput are reported. Classifiers that take a whole (N, 21, 3) batch are
+# also timed batched. Runs headless, without a camera or GPU:
+#
+#     python benchmark_classifiers.py                          # report only
+#     python benchmark_classifiers.py --save-baseline base.json
+#     python benchmark_classifiers.py --baseline base.json     # exit 1 on regression
+#
+# Hands are synthetic (synthetic_hands.py) unless --recording points at a landmark
+# recording (recording.py), whose hands are then cycled through.
+SYNTHETIC_POOL = 10000
+# Batched classifiers get at most this many hands per call, so 10^6 hands never
+# have to be in memory at once
+BATCH_SIZE = 65536
+DEFAULT_TOLERANCE = 1.5
+PERCENTILES = (50, 90, 99)
+
+
+def load_script_function(path, name, namespace):
+    # gesturemcqsample.py opens the camera as soon as it is imported, so only the
+    # function's own definition is compiled out of its source
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == name:
+            code = compile(ast.Module(body=[node], type_ignores=[]), path, "exec")
+            exec(code, namespace)
+            return namespace[name]
+    raise LookupError(f"{name} not found in {path}")
+
+
+def build_classifiers(model_path=None):
+    # name -> (per-hand callable (points, handedness), batched callable or None)
+    import landmarks
+    from landmarks import count_extended_fingers
+    from gesture_model import GestureModel, train_gesture_model
+    from synthetic_hands import synthetic_dataset
+    import video_thread
+    import test as navigation
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    interpret_gesture = load_script_function(os.path.join(here, "gesturemcqsample.py"), "interpret_gesture",
+                                             {"as_landmark_array": landmarks.as_landmark_array,
+                                              "count_extended_fingers": count_extended_fingers})
+    answer_thread = video_thread.VideoThread()
+    navigation_thread = navigation.VideoThread()
+
+    if model_path:
+        model = GestureModel.load(model_path)
+    else:
+        points, labels, handedness = synthetic_dataset(2000, seed=11)
+        model = train_gesture_model(points, labels, handedness)
+
+    # test.py's detector also feeds its swipe and template history, so it gets a
+    # steadily advancing clock
+    clock = iter(range(1 << 62))
+    return {
+        "detect_gesture": (answer_thread.detect_gesture, None),
+        "interpret_gesture": (interpret_gesture, None),
+        "test.detect_gesture": (lambda points, label: navigation_thread.detect_gesture(
+            points, label, next(clock) / 30.0), None),
+        "finger_count_gesture": (landmarks.finger_count_gesture,
+                                 lambda points, labels: count_extended_fingers(points, labels)),
+        "gesture_model": (model.classify, model.predict),
+    }
+
+
+def load_hands(recording=None):
+    if recording:
+        from recording import open_recording
+        records, _ = open_recording(recording)
+        records = records[records["hand_count"] > 0]
+        if len(records) == 0:
+            raise ValueError(f"{recording} has no hands in it")
+        from recording import COORDINATE_SCALE
+        points = records["landmarks"].astype(np.float32) / COORDINATE_SCALE
+        labels = np.where(records["handedness"] < 0, "Left", "Right")
+        return points, labels
+    from synthetic_hands import synthetic_dataset
+    points, _, handedness = synthetic_dataset(SYNTHETIC_POOL, seed=5)
+    return points, np.array(handedness)
+
+
+def hand_sample(count, pool_size, seed=0):
+    # Which pool hands to classify, in random order
+    return np.random.default_rng(seed).integers(0, pool_size, size=count)
+
+
+def time_per_call(classify, points, labels, indices):
+    latencies = np.empty(len(indices), dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i, index in enumerate(indices.tolist()):
+        hand, label = points[index], labels[index]
+        started = clock()
+        classify(hand, label)
+        latencies[i] = clock() - started
+    return latencies
+
+
+def time_batched(batched, points, labels, indices):
+    elapsed = 0.0
+    for start in range(0, len(indices), BATCH_SIZE):
+        chunk = indices[start:start + BATCH_SIZE]
+        batch_points, batch_labels = points[chunk], labels[chunk]
+        started = time.perf_counter()
+        batched(batch_points, batch_labels)
+        elapsed += time.perf_counter() - started
+    return len(indices) / elapsed if elapsed > 0 else float("inf")
+
+
+def summarize(latencies):
+    total = latencies.sum() / 1e9
+    summary = {f"p{p}_us": float(np.percentile(latencies, p) / 1e3) for p in PERCENTILES}
+    summary["max_us"] = float(latencies.max() / 1e3)
+    summary["mean_us"] = float(latencies.mean() / 1e3)
+    summary["hands_per_second"] = len(latencies) / total if total > 0 else float("inf")
+    return summary
+
+
+def run(classifiers, pool_points, pool_labels, max_hands):
+    results = {}
+    sizes = [10 ** e for e in range(0, 7) if 10 ** e <= max_hands]
+    for name, (classify, batched) in classifiers.items():
+        # A short warm-up so the first timed call does not pay for lazy imports or caches
+        time_per_call(classify, pool_points, pool_labels, hand_sample(100, len(pool_points), seed=99))
+        for size in sizes:
+            indices = hand_sample(size, len(pool_points), seed=size)
+            entry = {"per_call": summarize(time_per_call(classify, pool_points, pool_labels, indices))}
+            if batched is not None:
+                entry["batched"] = {"hands_per_second": time_batched(batched, pool_points, pool_labels, indices)}
+            results.setdefault(name, {})[str(size)] = entry
+            print_entry(name, size, entry)
+    return results
+
+
+def print_entry(name, size, entry):
+    per_call = entry["per_call"]
+    line = (f"{name:22} {size:>8} hands  p50 {per_call['p50_us']:8.2f}  p90 {per_call['p90_us']:8.2f}  "
+            f"p99 {per_call['p99_us']:8.2f}  max {per_call['max_us']:9.1f} us  "
+            f"{per_call['hands_per_second']:>12,.0f} hands/s")
+    if "batched" in entry:
+        line += f"  batched {entry['batched']['hands_per_second']:>14,.0f} hands/s"
+    print(line)
+
+
+def compare(results, baseline, tolerance):
+    # A regression is a median latency or throughput worse than the baseline by more
+    # than the tolerance factor. Sizes under 1000 hands are too noisy to judge.
+    regressions = []
+    for name, sizes in results.items():
+        for size, entry in sizes.items():
+            previous = baseline.get("results", {}).get(name, {}).get(size)
+            if previous is None or int(size) < 1000:
+                continue
+            checks = [("p50", entry["per_call"]["p50_us"], previous["per_call"]["p50_us"], False),
+                      ("throughput", entry["per_call"]["hands_per_second"],
+                       previous["per_call"]["hands_per_second"], True)]
+            if "batched" in entry and "batched" in previous:
+                checks.append(("batched throughput", entry["batched"]["hands_per_second"],
+                               previous["batched"]["hands_per_second"], True))
+            for metric, now, before, higher_is_better in checks:
+                ratio = before / now if higher_is_better else now / before
+                if ratio > tolerance:
+                    regressions.append(f"{name} @ {size} hands: {metric} {ratio:.2f}x worse than baseline")
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Gesture classifier micro-benchmark")
+    parser.add_argument("--max-hands", type=int, default=10 ** 6)
+    parser.add_argument("--recording", help="landmark recording to take hands from")
+    parser.add_argument("--model", help="trained gesture model; a small one is trained if not given")
+    parser.add_argument("--only", action="append", help="benchmark only this classifier (repeatable)")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="write the results as a new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    classifiers = build_classifiers(args.model)
+    if args.only:
+        classifiers = {name: classifiers[name] for name in args.only}
+    pool_points, pool_labels = load_hands(args.recording)
+    results = run(classifiers, pool_points, pool_labels, args.max_hands)
+
+    report = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "numpy": np.__version__, "processor": platform.processor()},
+        "source": args.recording or "synthetic",
+        "results": results,
+    }
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("FAIL:", regression)
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.2f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,78 @@
+import sys
+import time
+
+import numpy as np
+
+from landmarks import count_extended_fingers
+from gesture_model import GestureModel, NO_GESTURE, train_gesture_model
+from synthetic_hands import synthetic_dataset
+
+# Compares the trained landmark classifier with the finger counting rule on
+# synthetic hands: accuracy on upright right hands, on a mix of left and right
+# hands, and on tilted ones, plus the cost of classifying a hand.
+#
+#     python benchmark_gesture_model.py [MODEL.npz]
+#
+# Without a model file one is trained on synthetic hands first. Per-hand inference
+# has to stay well below a millisecond to run next to hands.process on every frame.
+INFERENCE_BUDGET_SECONDS = 0.001
+TEST_HANDS = 3000
+TIMED_HANDS = 2000
+
+TEST_SETS = (
+    ("upright, right hands", dict(max_tilt=0.0, left_share=0.0)),
+    ("upright, mixed hands", dict(max_tilt=0.0, left_share=0.5)),
+    ("tilted up to 35 deg", dict(max_tilt=35.0, left_share=0.5)),
+    ("tilted up to 60 deg", dict(max_tilt=60.0, left_share=0.5)),
+    ("tilted 35 deg, noisy", dict(max_tilt=35.0, left_share=0.5, noise=0.04)),
+)
+
+
+def rule_predict(points, handedness=None):
+    # detect_gesture's rule, for a batch
+    counts = count_extended_fingers(points, handedness)
+    return np.where((counts >= 1) & (counts <= 4), counts - 1, NO_GESTURE)
+
+
+def per_hand_seconds(classify, points, handedness):
+    started = time.perf_counter()
+    for hand, label in zip(points, handedness):
+        classify(hand, label)
+    return (time.perf_counter() - started) / len(points)
+
+
+def main(argv):
+    if argv:
+        model = GestureModel.load(argv[0])
+    else:
+        points, labels, handedness = synthetic_dataset(6000, seed=1)
+        model = train_gesture_model(points, labels, handedness)
+
+    print(f"{'accuracy':24} {'rule':>8} {'rule+hand':>10} {'model':>8}")
+    for name, options in TEST_SETS:
+        points, labels, handedness = synthetic_dataset(TEST_HANDS, seed=2, **options)
+        rule = np.mean(rule_predict(points) == labels)
+        rule_handed = np.mean(rule_predict(points, handedness) == labels)
+        learned = np.mean(model.predict(points, handedness) == labels)
+        print(f"{name:24} {rule:8.3f} {rule_handed:10.3f} {learned:8.3f}")
+
+    points, labels, handedness = synthetic_dataset(TIMED_HANDS, seed=3)
+    rule_seconds = per_hand_seconds(lambda hand, label: rule_predict(hand, label), points, handedness)
+    model_seconds = per_hand_seconds(model.classify, points, handedness)
+    started = time.perf_counter()
+    model.predict(points, handedness)
+    batch_seconds = (time.perf_counter() - started) / len(points)
+
+    print()
+    print(f"rule, per hand:          {rule_seconds * 1e6:8.1f} us")
+    print(f"model, per hand:         {model_seconds * 1e6:8.1f} us (budget {INFERENCE_BUDGET_SECONDS * 1e6:.0f} us)")
+    print(f"model, batched per hand: {batch_seconds * 1e6:8.2f} us")
+
+    if model_seconds > INFERENCE_BUDGET_SECONDS:
+        print("FAIL: model inference is over budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,393 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from frame_sources import FrameSource, SyntheticSource, VideoFileSource
+from landmarks import handedness_labels, landmarks_to_array
+from synthetic_hands import gesture_label, render_hand, synthetic_hand
+
+# End-to-end benchmark of the gesture quiz video pipeline: frames go through the real
+# VideoThread (capture thread, mailbox, colour conversion and flip, hands.process,
+# classification, debouncing, signal emission) and the script reports
+#
+#   - sustained frame rate, and frames dropped in the capture mailbox
+#   - per-frame latency, from the moment a frame was read from its source to the end
+#     of its processing, p50 / p95 / p99
+#   - latency from the first frame of a new hand pose to the gesture_detected signal
+#
+#     python benchmark_pipeline.py                      # synthetic hands, no GUI
+#     python benchmark_pipeline.py --gui                # with a preview window
+#     python benchmark_pipeline.py --video clip.mp4 --schedule clip.json
+#
+# Every frame's index is stamped into its top-left corner as a row of black and
+# white blocks when it is read, and read back from the image the pipeline actually
+# processed, so dropped or reordered frames cannot skew the numbers. The schedule
+# says which pose is shown from which frame on.
+#
+# By default the frames are procedurally drawn hands (render_hand), alternating with
+# empty frames, and each pose is expected to be read as the gesture it was drawn as.
+# MediaPipe does not read every drawn pose reliably (see render_hand), so each pose
+# is first run through the same tracker and classifier off the clock; poses read as
+# drawn in fewer than CALIBRATION_AGREEMENT of the frames are left out, and the
+# benchmark stops if that leaves fewer than half of them. For recorded clips of real
+# hands the schedule is a JSON list of [first_frame, option] pairs, option "A"-"D" or
+# null for frames without a gesture.
+FRAME_ID_BITS = 24
+FRAME_ID_BLOCK = 8
+OPTIONS = "ABCD"
+# Poses tried by default, thumb first: options A-D with the thumb out, which
+# render_hand draws in a way MediaPipe reads
+DEFAULT_POSES = ("10000", "11000", "11100", "11110")
+CALIBRATION_FRAMES = 30
+# Share of calibration frames that must read a pose as drawn for it to be used
+CALIBRATION_AGREEMENT = 0.6
+BACKGROUND = (70, 80, 90)
+PERCENTILES = (50, 95, 99)
+
+
+def stamp_frame_id(image, frame_id):
+    for bit in range(FRAME_ID_BITS):
+        value = 255 if frame_id >> bit & 1 else 0
+        image[:FRAME_ID_BLOCK, bit * FRAME_ID_BLOCK:(bit + 1) * FRAME_ID_BLOCK] = value
+
+
+def read_frame_id(image):
+    # Block means survive the blur and re-encoding of a recorded clip
+    blocks = image[:FRAME_ID_BLOCK, :FRAME_ID_BITS * FRAME_ID_BLOCK].reshape(
+        FRAME_ID_BLOCK, FRAME_ID_BITS, FRAME_ID_BLOCK, -1)
+    bits = blocks.mean(axis=(0, 2, 3)) > 127
+    return int(np.dot(bits, 1 << np.arange(FRAME_ID_BITS)))
+
+
+# Wraps another source, stamps each frame with its index and notes the time it was
+# read. The wrapped source does its own pacing.
+class StampedSource(FrameSource):
+    def __init__(self, source, frame_count):
+        super().__init__(fps=source.fps, realtime=False)
+        self.source = source
+        self.read_times = np.full(frame_count, np.nan)
+
+    def isOpened(self):
+        return self.source.isOpened()
+
+    def read(self):
+        if self.frame_index >= len(self.read_times):
+            return False, None
+        ret, frame = self.source.read()
+        if not ret:
+            return False, None
+        stamp_frame_id(frame, self.frame_index)
+        self.read_times[self.frame_index] = time.monotonic()
+        self.frame_index += 1
+        return True, frame
+
+    def release(self):
+        self.source.release()
+
+
+def parse_pose(text):
+    if len(text) != 5 or set(text) - set("01"):
+        raise ValueError(f"A pose is five 0/1 digits, thumb first: {text!r}")
+    return [digit == "1" for digit in text]
+
+
+# Draws pose (or nothing, for None) at a slowly wandering position, as a hand held
+# up to a camera would never be perfectly still
+def draw_pose(frame_index, width, height, pose, scale):
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = BACKGROUND
+    if pose is not None:
+        center = (0.5 + 0.01 * np.sin(frame_index / 3.0), 0.62 + 0.005 * np.cos(frame_index / 4.0))
+        points = synthetic_hand(pose, scale=scale, center=center)
+        # synthetic_hand builds the mirrored selfie view; the camera sees it the other way round
+        points[:, 0] = 1.0 - points[:, 0]
+        render_hand(image, points)
+        cv2.GaussianBlur(image, (3, 3), 0, dst=image)
+    return image
+
+
+def expected_gesture(pose):
+    gesture = gesture_label(pose)
+    return gesture if gesture >= 0 else None
+
+
+# Reads every pose with the tracker and classifier the pipeline uses. Returns, per
+# pose, the share of frames read as the gesture it was drawn as and the reading seen
+# most often.
+def calibrate(poses, hands, classify, scale, size):
+    width, height = size
+    blank = draw_pose(0, width, height, None, scale)
+    readings = {}
+    for name in poses:
+        pose = parse_pose(name)
+        # Empty frames in between so tracking from the previous pose does not carry over
+        for _ in range(5):
+            hands.process(cv2.cvtColor(blank, cv2.COLOR_BGR2RGB))
+        votes = []
+        for frame_index in range(CALIBRATION_FRAMES):
+            rgb = cv2.cvtColor(draw_pose(frame_index, width, height, pose, scale), cv2.COLOR_BGR2RGB)
+            results = hands.process(cv2.flip(rgb, 1))
+            gesture = None
+            if results.multi_hand_landmarks:
+                gesture = classify(landmarks_to_array(results.multi_hand_landmarks[0]),
+                                   handedness_labels(results)[0])
+            votes.append(gesture)
+        readings[name] = (votes.count(expected_gesture(pose)) / len(votes), max(set(votes), key=votes.count))
+    for _ in range(5):
+        hands.process(cv2.cvtColor(blank, cv2.COLOR_BGR2RGB))
+    return readings
+
+
+def describe_gesture(gesture):
+    return "no gesture" if gesture is None else f"option {OPTIONS[gesture]}"
+
+
+# A schedule is a list of (first_frame, pose name or None, expected gesture or None),
+# in frame order
+def synthetic_schedule(poses, fps, neutral_seconds, hold_seconds, repeats):
+    schedule = []
+    frame = 0
+    for _ in range(repeats):
+        for name in poses:
+            schedule.append((frame, None, None))
+            frame += int(round(neutral_seconds * fps))
+            schedule.append((frame, name, expected_gesture(parse_pose(name))))
+            frame += int(round(hold_seconds * fps))
+    schedule.append((frame, None, None))
+    frame += int(round(neutral_seconds * fps))
+    return schedule, frame
+
+
+def load_schedule(path):
+    with open(path) as f:
+        entries = json.load(f)
+    schedule = []
+    for first_frame, option in entries:
+        gesture = None if option is None else OPTIONS.index(option.upper())
+        schedule.append((int(first_frame), option, gesture))
+    return sorted(schedule, key=lambda entry: entry[0])
+
+
+# Collects what happens in the pipeline. frame_done runs on the worker thread; the
+# gesture slots on whichever thread the signal is delivered to.
+class PipelineProbe:
+    def __init__(self, capacity):
+        self.frame_ids = np.zeros(capacity, dtype=np.int64)
+        self.done_times = np.zeros(capacity)
+        self.frames = 0
+        self.detections = []
+        self.tentatives = []
+
+    def frame_done(self, captured):
+        now = time.monotonic()
+        if self.frames < len(self.frame_ids):
+            self.frame_ids[self.frames] = read_frame_id(captured.image)
+            self.done_times[self.frames] = now
+            self.frames += 1
+
+    def gesture_detected(self, gesture):
+        self.detections.append((time.monotonic(), gesture))
+
+    def gesture_tentative(self, gesture):
+        self.tentatives.append((time.monotonic(), gesture))
+
+
+def percentiles(values, scale=1e3):
+    if len(values) == 0:
+        return {f"p{p}_ms": None for p in PERCENTILES}
+    return {f"p{p}_ms": float(np.percentile(values, p) * scale) for p in PERCENTILES}
+
+
+def analyse(schedule, read_times, probe):
+    frames = probe.frames
+    frame_ids = probe.frame_ids[:frames]
+    done_times = probe.done_times[:frames]
+    valid = (frame_ids < len(read_times)) & ~np.isnan(read_times[np.minimum(frame_ids, len(read_times) - 1)])
+    latencies = done_times[valid] - read_times[frame_ids[valid]]
+    elapsed = done_times[-1] - done_times[0] if frames > 1 else 0.0
+    frames_read = int(np.count_nonzero(~np.isnan(read_times)))
+
+    # Every detection belongs to the segment that was on screen when it was emitted
+    starts = [read_times[first] if first < len(read_times) else np.inf for first, _, _ in schedule]
+    segments = []
+    for index, (first, pose, expected) in enumerate(schedule):
+        begin = starts[index]
+        end = starts[index + 1] if index + 1 < len(starts) else np.inf
+        if np.isnan(begin):
+            continue
+        emitted = [(t, gesture) for t, gesture in probe.detections if begin <= t < end]
+        segments.append({"first_frame": first, "pose": pose, "expected": expected,
+                         "detected": [gesture for _, gesture in emitted],
+                         "onset_latency": emitted[0][0] - begin if emitted else None})
+
+    posed = [s for s in segments if s["expected"] is not None]
+    hits = [s for s in posed if s["detected"] and s["detected"][0] == s["expected"]]
+    onset = np.array([s["onset_latency"] for s in hits])
+    return {
+        "frames_read": frames_read,
+        "frames_processed": frames,
+        "frames_dropped": frames_read - frames,
+        "sustained_fps": (frames - 1) / elapsed if elapsed > 0 else None,
+        "frame_latency": percentiles(latencies),
+        "frame_id_errors": int(np.count_nonzero(~valid)),
+        "poses_shown": len(posed),
+        "poses_detected": len(hits),
+        "wrong_gestures": sum(1 for s in posed if s["detected"] and s["detected"][0] != s["expected"]),
+        "missed_poses": sum(1 for s in posed if not s["detected"]),
+        "false_detections": sum(len(s["detected"]) for s in segments if s["expected"] is None),
+        "onset_latency": dict(percentiles(onset),
+                              max_ms=float(onset.max() * 1e3) if len(onset) else None),
+        "segments": segments,
+    }
+
+
+def print_report(report):
+    def ms(value):
+        return "   n/a" if value is None else f"{value:6.1f}"
+
+    fps = report["sustained_fps"]
+    print(f"frames: {report['frames_read']} read, {report['frames_processed']} processed, "
+          f"{report['frames_dropped']} dropped; sustained {fps:.1f} fps" if fps else
+          f"frames: {report['frames_read']} read, {report['frames_processed']} processed")
+    latency = report["frame_latency"]
+    print("frame latency (read -> processed):  " +
+          "  ".join(f"p{p} {ms(latency[f'p{p}_ms'])} ms" for p in PERCENTILES))
+    onset = report["onset_latency"]
+    print("pose onset -> gesture_detected:     " +
+          "  ".join(f"p{p} {ms(onset[f'p{p}_ms'])} ms" for p in PERCENTILES) +
+          f"  max {ms(onset['max_ms'])} ms")
+    print(f"poses: {report['poses_shown']} shown, {report['poses_detected']} detected, "
+          f"{report['wrong_gestures']} as the wrong gesture, {report['missed_poses']} missed; "
+          f"{report['false_detections']} detections without a pose")
+    if report["frame_id_errors"]:
+        print(f"WARNING: {report['frame_id_errors']} frames had an unreadable frame id")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="End-to-end gesture pipeline benchmark")
+    parser.add_argument("--gui", action="store_true", help="show the preview in a window while running")
+    parser.add_argument("--video", help="recorded clip to play instead of synthetic hands")
+    parser.add_argument("--schedule", help="JSON [first_frame, option] list for --video")
+    parser.add_argument("--pose", action="append",
+                        help="synthetic pose as five 0/1 digits, thumb first (repeatable)")
+    parser.add_argument("--scale", type=float, default=0.16, help="synthetic hand size, in frame widths per palm")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--neutral", type=float, default=2.0, help="seconds without a hand between poses")
+    parser.add_argument("--hold", type=float, default=2.0, help="seconds each pose is held")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import Qt
+    import video_thread
+
+    thread = video_thread.VideoThread()
+    size = (640, 480)
+    if args.video:
+        if not args.schedule:
+            print("--video needs a --schedule")
+            return 2
+        schedule = load_schedule(args.schedule)
+        source = VideoFileSource(args.video)
+        if not source.isOpened():
+            print(f"Cannot open {args.video}")
+            return 1
+        frame_count = int(source.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        readings = None
+        # Loads the model now, so its start-up is not part of the measurements
+        with video_thread.hand_tracker.lease():
+            pass
+    else:
+        with video_thread.hand_tracker.lease() as hands:
+            readings = calibrate(args.pose or DEFAULT_POSES, hands, thread.detect_gesture, args.scale, size)
+        usable = []
+        for name, (agreement, most_common) in readings.items():
+            drawn_as = describe_gesture(expected_gesture(parse_pose(name)))
+            if agreement >= CALIBRATION_AGREEMENT:
+                usable.append(name)
+                print(f"pose {name}: read as {drawn_as} in {agreement:.0%} of frames")
+            else:
+                print(f"pose {name}: drawn as {drawn_as}, read as it in only {agreement:.0%} of frames "
+                      f"(mostly {describe_gesture(most_common)}), left out")
+        if len(usable) * 2 < len(readings):
+            print(f"Only {len(usable)} of {len(readings)} poses are read as drawn, too few to measure; "
+                  "try another --scale or --pose, or a recorded --video")
+            return 1
+        schedule, frame_count = synthetic_schedule(usable, args.fps, args.neutral, args.hold, args.repeats)
+        poses = np.full(frame_count, -1)
+        pose_list = []
+        for first, pose, _ in schedule:
+            poses[first:] = -1 if pose is None else len(pose_list)
+            if pose is not None:
+                pose_list.append(parse_pose(pose))
+        source = SyntheticSource(
+            *size, fps=args.fps, frame_count=frame_count,
+            generator=lambda frame_index, width, height: draw_pose(
+                frame_index, width, height,
+                pose_list[poses[frame_index]] if poses[frame_index] >= 0 else None, args.scale))
+
+    stamped = StampedSource(source, frame_count)
+    probe = PipelineProbe(frame_count)
+    thread.source = stamped
+    thread.frame_listener = probe.frame_done
+
+    if args.gui:
+        from PyQt5.QtGui import QPixmap
+        from PyQt5.QtWidgets import QApplication, QLabel
+        app = QApplication([])
+        view = QLabel()
+        view.setMinimumSize(400, 300)
+        view.setAlignment(Qt.AlignCenter)
+        view.setWindowTitle("Gesture pipeline benchmark")
+
+        def update_view():
+            image = thread.frame_delivery.take()
+            if image is not None:
+                view.setPixmap(QPixmap.fromImage(image))
+
+        thread.frame_delivery.frame_ready.connect(update_view)
+        thread.preview.set_target_size(400, 300)
+        view.show()
+        # Delivered through the event loop, as in the quiz, so the GUI thread's share counts
+        thread.gesture_detected.connect(probe.gesture_detected)
+        thread.gesture_tentative.connect(probe.gesture_tentative)
+    else:
+        from PyQt5.QtCore import QCoreApplication
+        app = QCoreApplication([])
+        thread.preview.set_visible(False)
+        thread.gesture_detected.connect(probe.gesture_detected, Qt.DirectConnection)
+        thread.gesture_tentative.connect(probe.gesture_tentative, Qt.DirectConnection)
+
+    thread.finished.connect(app.quit)
+    thread.start()
+    app.exec_()
+    thread.stop()
+
+    report = analyse(schedule, stamped.read_times, probe)
+    print_report(report)
+    if args.json:
+        report.update({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "processor": platform.processor()},
+            "mode": "gui" if args.gui else "headless",
+            "source": args.video or "synthetic",
+            "calibration": readings and {name: {"read_as_drawn": agreement, "most_common": most_common}
+                                         for name, (agreement, most_common) in readings.items()},
+        })
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=float)
+        print(f"report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
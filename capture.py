@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+from frame_sources import open_frame_source
+
+# A frame read from the camera together with its sequence number, capture time and
+# how long the read itself took
+CapturedFrame = namedtuple("CapturedFrame", ["frame_id", "timestamp", "image", "read_seconds"],
+                           defaults=(0.0,))
+
+
+# Bounded drop-oldest slot between the capture thread and the inference thread.
+# The producer never blocks: when the slot is full the oldest frame is thrown away,
+# and the consumer always receives the freshest frame that is available.
+class LatestFrameMailbox:
+    def __init__(self, capacity=1):
+        self.frames = deque(maxlen=max(1, capacity))
+        self.condition = threading.Condition()
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, frame):
+        with self.condition:
+            if self.closed:
+                return
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(frame)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        # Returns the newest frame, or None on timeout / once the mailbox is closed and empty
+        with self.condition:
+            if not self.frames and not self.closed:
+                self.condition.wait(timeout)
+            if not self.frames:
+                return None
+            frame = self.frames.pop()
+            # Anything older than the frame we hand out is stale by now
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            return frame
+
+    def clear(self):
+        # Forgets queued frames and counters, e.g. when a paused camera is resumed
+        with self.condition:
+            self.frames.clear()
+            self.dropped = 0
+
+    def wake(self):
+        # Makes a waiting get() return None straight away
+        with self.condition:
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+# Reads frames from a cv2.VideoCapture-like object as fast as the device delivers them,
+# so the OS camera buffer is always drained and inference never sees stale frames.
+# While paused the device stays open but nothing is read.
+class CaptureThread(threading.Thread):
+    def __init__(self, cap, mailbox, paused=False):
+        super().__init__(name="CaptureThread", daemon=True)
+        self.cap = cap
+        self.mailbox = mailbox
+        self.frames_captured = 0
+        # Seconds from the last resume() to the first frame read after it
+        self.resumed_at = None
+        self.resume_latency = None
+        self._stop_event = threading.Event()
+        self._active = threading.Event()
+        if not paused:
+            self._active.set()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                if not self._active.is_set():
+                    self._active.wait()
+                    continue
+                started = time.perf_counter()
+                ret, frame = self.cap.read()
+                read_seconds = time.perf_counter() - started
+                if not ret:
+                    break
+                now = time.monotonic()
+                if self.resume_latency is None and self.resumed_at is not None:
+                    self.resume_latency = now - self.resumed_at
+                self.mailbox.put(CapturedFrame(self.frames_captured, now, frame, read_seconds))
+                self.frames_captured += 1
+        finally:
+            # The capture thread owns the device, so it is released here and never
+            # while another thread may still be inside cap.read()
+            self.cap.release()
+            self.mailbox.close()
+
+    def pause(self):
+        self._active.clear()
+
+    def resume(self):
+        self.resume_latency = None
+        self.resumed_at = time.monotonic()
+        self._active.set()
+
+    def stop(self):
+        self._stop_event.set()
+        # A paused thread has to be woken up to notice it should stop
+        self._active.set()
+
+
+# Keeps one frame source open across quiz sessions, so the camera is negotiated once
+# per login instead of once per quiz. resume() hands out the mailbox that frames
+# arrive in; pause() stops reading without closing the device. Only the capture
+# thread ever touches the device, and close() joins it before returning, so a
+# release can never race with a read.
+#
+# open_seconds and first_frame_seconds record how long the device took to open and
+# to deliver its first frame; resume_latency is the same for the most recent resume().
+class CameraManager:
+    def __init__(self, spec="0", source=None):
+        self.spec = spec
+        self.source = source
+        self.mailbox = LatestFrameMailbox()
+        self.capture_thread = None
+        self.open_seconds = None
+        self.first_frame_seconds = None
+        self._lock = threading.Lock()
+        # Bumped by every close(), so an open_async() from before it does not open the
+        # device after all
+        self._generation = 0
+
+    @property
+    def is_open(self):
+        return self.capture_thread is not None and self.capture_thread.is_alive()
+
+    @property
+    def resume_latency(self):
+        return self.capture_thread.resume_latency if self.capture_thread else None
+
+    def open(self, generation=None):
+        with self._lock:
+            if self.is_open or (generation is not None and generation != self._generation):
+                return
+            started = time.monotonic()
+            cap = self.source if self.source is not None else open_frame_source(self.spec)
+            self.open_seconds = time.monotonic() - started
+
+            # The first read is where most webcams finish negotiating, so it is done
+            # here rather than when the first quiz starts. Clips, image directories and
+            # synthetic frames have nothing to negotiate and would only lose a frame.
+            if getattr(cap, "is_live", True):
+                ret, _ = cap.read()
+                if ret:
+                    self.first_frame_seconds = time.monotonic() - started
+
+            self.mailbox = LatestFrameMailbox()
+            self.capture_thread = CaptureThread(cap, self.mailbox, paused=True)
+            self.capture_thread.start()
+
+    def open_async(self):
+        # Opens the device in the background, e.g. right after login, unless close()
+        # is called before the open gets going
+        with self._lock:
+            generation = self._generation
+        threading.Thread(target=self.open, args=(generation,), name="CameraOpen", daemon=True).start()
+
+    def resume(self):
+        self.open()
+        with self._lock:
+            # Whatever was left over from before the pause is stale
+            self.mailbox.clear()
+            if self.capture_thread:
+                self.capture_thread.resume()
+            return self.mailbox
+
+    def pause(self):
+        with self._lock:
+            if self.capture_thread:
+                self.capture_thread.pause()
+
+    def close(self):
+        with self._lock:
+            self._generation += 1
+            thread, self.capture_thread = self.capture_thread, None
+        if thread:
+            thread.stop()
+            thread.join()
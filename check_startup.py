@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+# Startup budget for the application: importing main.py and showing the login dialog
+# must stay within these limits, and must not load any of the vision libraries.
+# Run as `python check_startup.py`; it exits with status 1 when the budget is blown.
+IMPORT_BUDGET_SECONDS = 0.5
+LOGIN_BUDGET_SECONDS = 1.0
+DEFERRED_MODULES = ("cv2", "mediapipe", "numpy", "video_thread")
+RUNS = 5
+
+# Runs in a fresh interpreter each time, so nothing is already imported
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+dialog = main.LoginDialog()
+dialog.show()
+app.processEvents()
+shown = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported - started,
+    "login_seconds": shown - started,
+    "loaded": [name for name in %r if name in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def measure():
+    env = dict(os.environ)
+    if not env.get("DISPLAY") and not env.get("WAYLAND_DISPLAY"):
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    here = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, "-c", PROBE], cwd=here, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    runs = [measure() for _ in range(RUNS)]
+    # The fastest run is the least disturbed by whatever else the machine is doing
+    import_seconds = min(run["import_seconds"] for run in runs)
+    login_seconds = min(run["login_seconds"] for run in runs)
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+
+    print(f"import main:      {import_seconds * 1000:7.1f} ms (budget {IMPORT_BUDGET_SECONDS * 1000:.0f} ms)")
+    print(f"login dialog up:  {login_seconds * 1000:7.1f} ms (budget {LOGIN_BUDGET_SECONDS * 1000:.0f} ms)")
+
+    failures = []
+    if import_seconds > IMPORT_BUDGET_SECONDS:
+        failures.append("importing main.py is over budget")
+    if login_seconds > LOGIN_BUDGET_SECONDS:
+        failures.append("showing the login dialog is over budget")
+    if loaded:
+        failures.append("loaded at startup: " + ", ".join(loaded))
+
+    for failure in failures:
+        print("FAIL:", failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+import os
+import sqlite3
+import sys
+import threading
+
+import profiling
+
+# Where the quiz database lives; GESTURA_DATABASE points the app at another file
+DATABASE_PATH = os.environ.get("GESTURA_DATABASE", "gestura.db")
+# Seconds a statement waits for another connection's lock before giving up, so two
+# instances or threads on one database queue instead of failing with "database is
+# locked"
+BUSY_TIMEOUT = 10.0
+# Statements the sqlite3 module keeps prepared per connection, by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# WAL lets readers and one writer work at the same time, and with it synchronous=NORMAL
+# only syncs at checkpoints: a power cut can lose the last commits, never corrupt the
+# file. Reads go through a 256 MB memory map and a 32 MB page cache.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-32768",
+    "PRAGMA temp_store=MEMORY",
+)
+# WAL needs shared memory between the processes using the database, which network
+# filesystems (e.g. a shared lab drive) do not provide, and memory-mapped reads are
+# not safe there either. A database on one gets the rollback journal, fully synced,
+# and plain reads instead; readers then wait for a writer, but instances on different
+# machines can share the file. GESTURA_JOURNAL_MODE=wal or delete overrides the check.
+NETWORK_PRAGMAS = (
+    "PRAGMA journal_mode=DELETE",
+    "PRAGMA synchronous=FULL",
+    "PRAGMA mmap_size=0",
+    "PRAGMA cache_size=-32768",
+    "PRAGMA temp_store=MEMORY",
+)
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smb3", "smbfs", "ncpfs", "afs", "9p", "fuse.sshfs",
+                       "davfs", "fuse.davfs2", "glusterfs", "ceph", "lustre"}
+
+
+def on_network_filesystem(path):
+    # Best effort: Windows network drives and UNC paths, and the mount table on Linux;
+    # elsewhere the database is taken to be local
+    path = os.path.abspath(path)
+    if sys.platform == "win32":
+        if path.startswith("\\\\"):
+            return True
+        import ctypes
+        # 4 is DRIVE_REMOTE, a mapped network drive
+        return ctypes.windll.kernel32.GetDriveTypeW(os.path.splitdrive(path)[0] + "\\") == 4
+    try:
+        with open("/proc/self/mounts") as f:
+            mounts = [line.split()[1:3] for line in f]
+    except OSError:
+        return False
+    path = os.path.realpath(path)
+    filesystem, longest = None, -1
+    for mount_point, kind in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+        if inside and len(mount_point) > longest:
+            filesystem, longest = kind, len(mount_point)
+    return filesystem in NETWORK_FILESYSTEMS
+
+
+def connection_pragmas(path):
+    mode = os.environ.get("GESTURA_JOURNAL_MODE", "").lower()
+    if mode == "wal":
+        return CONNECTION_PRAGMAS
+    if mode == "delete" or (path != ":memory:" and on_network_filesystem(path)):
+        return NETWORK_PRAGMAS
+    return CONNECTION_PRAGMAS
+
+
+# A pooled connection. The widgets open and close a connection around every query;
+# close() now only hands it back, rolling back whatever was left uncommitted, and the
+# underlying database connection stays open for the next caller on the same thread.
+class PooledConnection(sqlite3.Connection):
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def dispose(self):
+        super().close()
+
+
+class TimedPooledConnection(PooledConnection, profiling.TimedConnection):
+    pass
+
+
+# One long-lived connection per thread and database file. sqlite3 connections must
+# not be shared between threads, and a thread that is done with the database (e.g. a
+# background import) calls release() so its connection does not linger.
+class ConnectionPool:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+        self.pragmas = connection_pragmas(path)
+
+    def connection(self):
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = self.local.connection = self._open()
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def _open(self):
+        factory = TimedPooledConnection if profiling.enabled() else PooledConnection
+        # Each connection is only used by the thread that opened it; the same-thread
+        # check is off so close_all() can close them from the GUI thread on exit
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, factory=factory,
+                                     cached_statements=STATEMENT_CACHE_SIZE, check_same_thread=False)
+        for pragma in self.pragmas:
+            connection.execute(pragma)
+        return connection
+
+    def release(self):
+        # Closes the calling thread's connection, if it has one
+        connection = getattr(self.local, "connection", None)
+        if connection is not None:
+            self.local.connection = None
+            with self.lock:
+                self.connections.remove(connection)
+            connection.dispose()
+
+    def close_all(self):
+        # On exit; other threads must be done with the database by then
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for connection in connections:
+            connection.dispose()
+        self.local = threading.local()
+
+
+pool = ConnectionPool(DATABASE_PATH)
+
+
+def get_connection():
+    return pool.connection()
+
+
+# Schema changes in the order they were made. A database's PRAGMA user_version is the
+# number of them already applied, so every start applies only the ones it is missing,
+# and a database from before migrations (user_version 0, tables already there) just
+# runs the first one as a no-op. Never edit a migration that has shipped; add one.
+MIGRATIONS = (
+    # 1: the original schema
+    (
+        """CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            role TEXT NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS quizzes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            teacher_id INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            FOREIGN KEY (teacher_id) REFERENCES users (id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            quiz_id INTEGER NOT NULL,
+            question_text TEXT NOT NULL,
+            options TEXT NOT NULL,
+            correct_answer INTEGER NOT NULL,
+            FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+        )""",
+        """CREATE TABLE IF NOT EXISTS results (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            student_id INTEGER NOT NULL,
+            quiz_id INTEGER NOT NULL,
+            score INTEGER NOT NULL,
+            total_questions INTEGER NOT NULL,
+            FOREIGN KEY (student_id) REFERENCES users (id),
+            FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
+        )""",
+    ),
+    # 2: indexes for the quiz and result lists. Each covers every column its queries
+    # read, so they are answered from the index alone.
+    (
+        # Question counts per quiz (load_quizzes), a quiz's questions
+        "CREATE INDEX IF NOT EXISTS questions_by_quiz ON questions (quiz_id)",
+        # A teacher's quizzes (load_quizzes)
+        "CREATE INDEX IF NOT EXISTS quizzes_by_teacher ON quizzes (teacher_id, title)",
+        # A student's results (load_results) and earlier attempts (take_gesture_quiz)
+        "CREATE INDEX IF NOT EXISTS results_by_student ON results (student_id, quiz_id, score, total_questions)",
+        # A quiz's results, best first (show_quiz_details, the teacher's load_results)
+        "CREATE INDEX IF NOT EXISTS results_by_quiz ON results (quiz_id, score DESC, student_id, total_questions)",
+    ),
+)
+
+
+def schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection):
+    # Applies the missing migrations, each in its own transaction together with the
+    # version bump. BEGIN IMMEDIATE takes the write lock first, so two instances that
+    # start at once apply every migration exactly once between them.
+    while schema_version(connection) < len(MIGRATIONS):
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            version = schema_version(connection)
+            if version < len(MIGRATIONS):
+                for statement in MIGRATIONS[version]:
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {version + 1}")
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+    return schema_version(connection)
+
+
+# The queries the quiz and result lists run on every refresh, as in main.py, with the
+# tables they may still read in full: the student's quiz list shows every quiz.
+HOT_QUERIES = {
+    "login": ("SELECT id FROM users WHERE username = ? AND password = ? AND role = ?", ("u", "p", "student"), ()),
+    "load_quizzes (teacher)": ("""
+        SELECT q.id, q.title, COUNT(qu.id)
+        FROM quizzes q
+        LEFT JOIN questions qu ON q.id = qu.quiz_id
+        WHERE q.teacher_id = ?
+        GROUP BY q.id""", (1,), ()),
+    "load_quizzes (student)": ("""
+        SELECT q.id, q.title, COUNT(qu.id)
+        FROM quizzes q
+        LEFT JOIN questions qu ON q.id = qu.quiz_id
+        GROUP BY q.id""", (), ("q",)),
+    "take_gesture_quiz": ("SELECT id FROM results WHERE student_id = ? AND quiz_id = ?", (1, 1), ()),
+    "load_questions": ("SELECT id, question_text, options, correct_answer FROM questions WHERE quiz_id = ?",
+                       (1,), ()),
+    "show_quiz_details": ("""
+        SELECT u.username, r.score, r.total_questions
+        FROM results r
+        JOIN users u ON r.student_id = u.id
+        WHERE r.quiz_id = ?
+        ORDER BY r.score DESC""", (1,), ()),
+    "load_results (teacher)": ("""
+        SELECT q.title, u.username, r.score, r.total_questions, r.id
+        FROM results r
+        JOIN quizzes q ON r.quiz_id = q.id
+        JOIN users u ON r.student_id = u.id
+        WHERE q.teacher_id = ?
+        ORDER BY q.title, r.score DESC""", (1,), ()),
+    "load_results (student)": ("""
+        SELECT q.title, r.score, r.total_questions, r.id
+        FROM results r
+        JOIN quizzes q ON r.quiz_id = q.id
+        WHERE r.student_id = ?
+        ORDER BY r.id DESC""", (1,), ()),
+}
+
+
+def full_scans(connection, sql, parameters=()):
+    # Tables (by the name or alias the query uses) that EXPLAIN QUERY PLAN reads in
+    # full, or through an automatic index that SQLite builds for every run of the query
+    # because no real one fits
+    scans = []
+    for row in connection.execute("EXPLAIN QUERY PLAN " + sql, parameters):
+        detail = row[-1]
+        if (detail.startswith("SCAN ") and " USING " not in detail) or " AUTOMATIC " in detail:
+            scans.append(detail.split()[1])
+    return scans
+
+
+def check_query_plans(connection):
+    # Returns a "query: plan" line for every hot query that scans a table it should not
+    problems = []
+    for name, (sql, parameters, allowed) in HOT_QUERIES.items():
+        unexpected = [table for table in full_scans(connection, sql, parameters) if table not in allowed]
+        if unexpected:
+            plan = "; ".join(row[-1] for row in connection.execute("EXPLAIN QUERY PLAN " + sql, parameters))
+            problems.append(f"{name}: {plan}")
+    return problems
+
+
+def main(argv):
+    # python database.py [DATABASE] [--check]
+    # Brings the database up to date; --check also fails if a hot query scans a table
+    check = "--check" in argv
+    paths = [arg for arg in argv if arg != "--check"]
+    connection = ConnectionPool(paths[0] if paths else DATABASE_PATH).connection()
+    before = schema_version(connection)
+    after = migrate(connection)
+    print(f"schema version {before} -> {after}" if after != before else f"schema version {after}, up to date")
+    if not check:
+        return 0
+    problems = check_query_plans(connection)
+    for problem in problems:
+        print("FULL SCAN:", problem)
+    if problems:
+        return 1
+    print(f"all {len(HOT_QUERIES)} hot queries use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,70 @@
+import math
+from collections import deque, namedtuple
+
+# What the debouncer reports: kind is "tentative" or "committed", share is the fraction
+# of the vote window that agreed, timestamp is the capture time of the deciding frame
+GestureEvent = namedtuple("GestureEvent", ["kind", "gesture", "share", "timestamp"])
+
+TENTATIVE = "tentative"
+COMMITTED = "committed"
+
+
+# Turns the per-frame output of a gesture classifier into debounced selections.
+#
+# Every frame casts one vote (a gesture id, or None when there is no hand or no
+# recognised pose) into a window of the last `window` frames. A gesture is
+# committed once at least `agreement` of the window votes for it, and reported
+# as tentative as soon as it leads the window with `tentative_votes` votes, so the
+# GUI can show what it is about to select. After a commit the debouncer is
+# disarmed until the committed pose loses its majority in the window, i.e. the
+# student lowers their hand or shows a different count; holding a pose never
+# selects twice, and a new pose can be selected without any fixed wait.
+#
+# Per frame the cost is O(1): vote counts are kept up to date as the window slides.
+class GestureDebouncer:
+    def __init__(self, window=6, agreement=0.6, tentative_votes=2):
+        self.window = max(1, int(window))
+        self.agreement = agreement
+        self.votes_needed = max(1, math.ceil(agreement * self.window))
+        self.tentative_votes = min(max(1, tentative_votes), self.votes_needed)
+        self.votes = deque(maxlen=self.window)
+        self.counts = {}
+        self.held = None
+        self.candidate = None
+
+    def reset(self):
+        self.votes.clear()
+        self.counts.clear()
+        self.held = None
+        self.candidate = None
+
+    def update(self, gesture, timestamp=None):
+        # Adds this frame's vote; returns a GestureEvent when something changed, else None
+        if len(self.votes) == self.window:
+            expired = self.votes[0]
+            self.counts[expired] -= 1
+        self.votes.append(gesture)
+        self.counts[gesture] = self.counts.get(gesture, 0) + 1
+
+        # The held pose re-arms the debouncer once it no longer has a majority
+        if self.held is not None and self.counts.get(self.held, 0) * 2 <= len(self.votes):
+            self.held = None
+
+        if gesture is None or gesture == self.held:
+            return None
+        votes = self.counts[gesture]
+        share = votes / self.window
+
+        if votes >= self.votes_needed:
+            self.held = gesture
+            self.candidate = None
+            return GestureEvent(COMMITTED, gesture, share, timestamp)
+        if gesture != self.candidate and votes >= self.tentative_votes and self._leads(gesture):
+            self.candidate = gesture
+            return GestureEvent(TENTATIVE, gesture, share, timestamp)
+        return None
+
+    def _leads(self, gesture):
+        votes = self.counts[gesture]
+        return all(count < votes for other, count in self.counts.items()
+                   if other is not None and other != gesture)
@@ -0,0 +1,216 @@
+import math
+import os
+
+import numpy as np
+
+from landmarks import WRIST, INDEX_FINGER_TIP
+
+MIDDLE_FINGER_MCP = 9
+# Every trajectory, live or recorded, is resampled to this many evenly timed steps
+TEMPLATE_LENGTH = 32
+# Seconds of movement a template covers
+TEMPLATE_SECONDS = 1.0
+# Sakoe-Chiba band: how far (in steps) DTW may warp one trajectory against the other
+WARPING_BAND = 4
+# Unless a template says otherwise, a trajectory matches it when their DTW distance
+# is below this share of the template's distance from a hand that does not move
+MATCH_RATIO = 0.2
+# Landmarks followed over time: the wrist for the hand's path, the index tip for pointing
+TRACKED_LANDMARKS = np.array([WRIST, INDEX_FINGER_TIP])
+NAVIGATION_ACTIONS = ("next", "prev", "submit")
+
+
+# A recorded dynamic gesture. samples is a (TEMPLATE_LENGTH, 4) trajectory as made by
+# trajectory_features, action what the quiz does when it is matched, and threshold
+# the largest DTW distance that still counts as a match.
+class GestureTemplate:
+    def __init__(self, name, action, samples, threshold=None):
+        self.name = name
+        self.action = action
+        self.samples = np.asarray(samples, dtype=np.float64)
+        if threshold is None:
+            threshold = MATCH_RATIO * stillness_distance(self.samples)
+        self.threshold = float(threshold)
+        self.upper, self.lower = keogh_envelope(self.samples, WARPING_BAND)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(str(data["name"]), str(data["action"]), data["samples"], float(data["threshold"]))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, name=self.name, action=self.action, samples=self.samples.astype(np.float32),
+                     threshold=self.threshold)
+
+
+# Templates live in a directory, one .npz file each, so new gestures are added by
+# recording them (see record_gesture.py) rather than by changing code
+def load_template_library(directory):
+    if not directory or not os.path.isdir(directory):
+        return []
+    return [GestureTemplate.load(os.path.join(directory, name))
+            for name in sorted(os.listdir(directory)) if name.endswith(".npz")]
+
+
+# Resamples a stretch of hand landmarks to TEMPLATE_LENGTH evenly timed steps of
+# (wrist x, wrist y, index tip x, index tip y). Positions are relative to the mean
+# wrist position and measured in palm lengths, so a trajectory does not depend on
+# where in the picture it was made, how far from the camera, or at what frame rate.
+# times: (N,) seconds, increasing. points: (N, 21, 3) or (N, 3, 2) as kept by
+# DynamicGestureMatcher (wrist, index tip, middle finger MCP).
+def trajectory_features(times, points, start=None, end=None):
+    times = np.asarray(times, dtype=np.float64)
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[1] != len(TRACKED_LANDMARKS) + 1:
+        points = points[:, [WRIST, INDEX_FINGER_TIP, MIDDLE_FINGER_MCP], :2]
+    start = times[0] if start is None else start
+    end = times[-1] if end is None else end
+    steps = np.linspace(start, end, TEMPLATE_LENGTH)
+
+    tracked = np.empty((TEMPLATE_LENGTH, 4))
+    for column, (landmark, axis) in enumerate(((0, 0), (0, 1), (1, 0), (1, 1))):
+        tracked[:, column] = np.interp(steps, times, points[:, landmark, axis])
+    palm = np.linalg.norm(points[:, 2] - points[:, 0], axis=-1).mean()
+    tracked[:, 0:4:2] -= tracked[:, 0].mean()
+    tracked[:, 1:4:2] -= tracked[:, 1].mean()
+    return tracked / max(palm, 1e-6)
+
+
+def stillness_distance(samples):
+    # Distance from a trajectory to the same hand held still at its mean position,
+    # i.e. how much movement there is to recognise
+    return float(((samples - samples.mean(axis=0)) ** 2).sum())
+
+
+def keogh_envelope(samples, band):
+    # Running max / min of a (L, D) trajectory over +-band steps, per feature. Edge
+    # padding makes the windows at either end the truncated ones.
+    padded = np.pad(samples, ((band, band), (0, 0)), mode="edge")
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * band + 1, axis=0)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(query, uppers, lowers):
+    # LB_Keogh lower bounds of the banded DTW distance from query to the trajectories
+    # whose envelopes are given; either side may be a stack (T, L, D), giving (T,)
+    above = np.maximum(query - uppers, 0.0)
+    below = np.maximum(lowers - query, 0.0)
+    return (above * above + below * below).sum(axis=(1, 2))
+
+
+def dtw_distance(query, template, band=WARPING_BAND, cutoff=math.inf):
+    # Banded DTW over squared Euclidean step costs. Gives up and returns inf as soon
+    # as a whole row is above cutoff, since the distance can only grow from there.
+    length = len(query)
+    difference = query[:, None, :] - template[None, :, :]
+    cost = (difference * difference).sum(axis=-1).tolist()
+    previous = [math.inf] * (length + 1)
+    previous[0] = 0.0
+    for i in range(length):
+        current = [math.inf] * (length + 1)
+        row = cost[i]
+        row_min = math.inf
+        for j in range(max(0, i - band), min(length, i + band + 1)):
+            best = min(previous[j], previous[j + 1], current[j])
+            value = row[j] + best
+            current[j + 1] = value
+            if value < row_min:
+                row_min = value
+        if row_min > cutoff:
+            return math.inf
+        previous = current
+    return previous[length]
+
+
+# Matches the most recent TEMPLATE_SECONDS of a hand's movement against a template
+# library on every frame.
+#
+# Samples go into a fixed-size ring buffer (timestamp, wrist, index tip, middle MCP).
+# Each update resamples the last window into a query trajectory and bounds its DTW
+# distance to every template in one vectorized step, with LB_Keogh taken both ways
+# (query against the template envelopes and templates against the query envelope).
+# The full DTW then only runs for templates in order of increasing bound, stopping
+# once the bound exceeds the best distance found so far, and each DTW is abandoned
+# as soon as it can no longer beat the best match or its template's threshold.
+#
+# A match is only reported once its distance has stopped improving for `settle`
+# seconds, so the window that lines up best with the movement wins over one that
+# caught only its beginning. After that the history is cleared, so one movement
+# triggers once.
+class DynamicGestureMatcher:
+    def __init__(self, templates, window=TEMPLATE_SECONDS, settle=0.1, capacity=256, max_gap=0.25):
+        self.templates = list(templates)
+        self.window = window
+        self.settle = settle
+        self.max_gap = max_gap
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.points = np.zeros((capacity, len(TRACKED_LANDMARKS) + 1, 2))
+        self.dtw_runs = 0
+        if self.templates:
+            self.samples = np.stack([template.samples for template in self.templates])
+            self.uppers = np.stack([template.upper for template in self.templates])
+            self.lowers = np.stack([template.lower for template in self.templates])
+        self.reset()
+
+    def reset(self):
+        self.head = 0
+        self.size = 0
+        self.pending = None
+        self.pending_distance = math.inf
+        self.pending_time = None
+
+    def update(self, timestamp, points):
+        # Adds one hand's (21, 3) landmarks; returns the matched GestureTemplate or None
+        if not self.templates:
+            return None
+        if self.size and timestamp - self.times[(self.head - 1) % self.capacity] > self.max_gap:
+            self.reset()
+        self.times[self.head] = timestamp
+        self.points[self.head] = points[[WRIST, INDEX_FINGER_TIP, MIDDLE_FINGER_MCP], :2]
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+        # Keep one sample at or before the start of the window to interpolate from,
+        # and wait until the history covers a whole window
+        start = timestamp - self.window
+        while self.size > 2 and self.times[(self.head - self.size + 1) % self.capacity] <= start:
+            self.size -= 1
+        if self.size < 2 or self.times[(self.head - self.size) % self.capacity] > start:
+            return None
+
+        order = (np.arange(self.head - self.size, self.head)) % self.capacity
+        query = trajectory_features(self.times[order], self.points[order], start, timestamp)
+        # Only a closer match than the pending one is of interest; anything else means
+        # the pending match was as good as it gets
+        match, distance = self.match(query, self.pending_distance)
+        if match is not None:
+            self.pending, self.pending_distance, self.pending_time = match, distance, timestamp
+        elif self.pending is not None and timestamp - self.pending_time >= self.settle:
+            found = self.pending
+            self.reset()
+            return found
+        return None
+
+    def match(self, query, cutoff=math.inf):
+        # Returns (template, distance) of the closest template within its threshold
+        # and below cutoff, or (None, inf)
+        query_upper, query_lower = keogh_envelope(query, WARPING_BAND)
+        bounds = np.maximum(lb_keogh(query, self.uppers, self.lowers),
+                            lb_keogh(self.samples, query_upper, query_lower))
+        best_distance = cutoff
+        best = None
+        for index in np.argsort(bounds):
+            if bounds[index] >= best_distance:
+                break
+            template = self.templates[index]
+            if bounds[index] > template.threshold:
+                continue
+            self.dtw_runs += 1
+            distance = dtw_distance(query, template.samples,
+                                    cutoff=min(best_distance, template.threshold))
+            if distance < best_distance and distance <= template.threshold:
+                best_distance = distance
+                best = template
+        return best, best_distance
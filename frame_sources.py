@@ -0,0 +1,164 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+# Base class for everything VideoThread can read frames from. Sources follow the
+# cv2.VideoCapture read()/release() protocol so the capture thread does not care
+# whether frames come from a webcam, a file or a generator.
+class FrameSource:
+    # Live sources deliver frames at their own rate; the others are paced by us
+    is_live = False
+
+    def __init__(self, fps=30.0, realtime=True):
+        self.fps = fps
+        self.realtime = realtime
+        self.frame_index = 0
+        self._next_frame_time = None
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        frame = self.next_frame()
+        if frame is None:
+            return False, None
+        self._pace()
+        self.frame_index += 1
+        return True, frame
+
+    def next_frame(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def _pace(self):
+        # Non-live sources either run at the recorded pace or as fast as possible
+        if self.is_live or not self.realtime or not self.fps:
+            return
+        interval = 1.0 / self.fps
+        now = time.monotonic()
+        # Start over instead of bursting to catch up when the reader fell more than a
+        # frame behind, e.g. while the capture was paused
+        if self._next_frame_time is None or now - self._next_frame_time > interval:
+            self._next_frame_time = now
+        delay = self._next_frame_time - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame_time += interval
+
+
+class CameraSource(FrameSource):
+    is_live = True
+
+    def __init__(self, index=0):
+        self.cap = cv2.VideoCapture(index)
+        # Keep the driver queue short so a resumed capture does not start on old frames
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS) or 30.0)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=True, loop=False):
+        self.path = path
+        self.loop = loop
+        self.cap = cv2.VideoCapture(path)
+        super().__init__(fps=self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime=realtime)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def next_frame(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop and self.frame_index:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, path, fps=30.0, realtime=True, loop=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.path = path
+        self.loop = loop
+        self.files = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def next_frame(self):
+        if not self.files:
+            return None
+        position = self.frame_index
+        if self.loop:
+            position %= len(self.files)
+        elif position >= len(self.files):
+            return None
+        return cv2.imread(self.files[position])
+
+
+# Generates frames in-process. Pass a generator(frame_index, width, height) that
+# returns a BGR image; the default draws a square sweeping across a dark frame.
+class SyntheticSource(FrameSource):
+    def __init__(self, width=640, height=480, fps=30.0, frame_count=None, generator=None, realtime=True):
+        super().__init__(fps=fps, realtime=realtime)
+        self.width = width
+        self.height = height
+        self.frame_count = frame_count
+        self.generator = generator or self.moving_square
+
+    def next_frame(self):
+        if self.frame_count is not None and self.frame_index >= self.frame_count:
+            return None
+        return self.generator(self.frame_index, self.width, self.height)
+
+    @staticmethod
+    def moving_square(frame_index, width, height):
+        frame = np.full((height, width, 3), 32, dtype=np.uint8)
+        size = max(8, min(width, height) // 6)
+        x = (frame_index * 8) % max(1, width - size)
+        y = (height - size) // 2
+        frame[y:y + size, x:x + size] = (0, 200, 255)
+        return frame
+
+
+# Builds a source from a short spec string, as used by the GESTURA_SOURCE setting:
+#   "0", "1", ...          live camera with that index
+#   "synthetic"            generated frames
+#   path to a directory    images in that directory, in name order
+#   anything else          a video file
+# A "fast:" prefix runs a non-live source as fast as possible instead of at its recorded pace.
+def open_frame_source(spec):
+    spec = str(spec).strip()
+    realtime = True
+    if spec.startswith("fast:"):
+        realtime = False
+        spec = spec[len("fast:"):]
+
+    if spec.isdigit():
+        return CameraSource(int(spec))
+    if spec == "synthetic":
+        return SyntheticSource(realtime=realtime)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
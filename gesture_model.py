@@ -0,0 +1,170 @@
+import os
+import sys
+
+import numpy as np
+
+from landmarks import (
+    NUM_LANDMARKS, WRIST, FINGER_TIPS, FINGER_JOINTS, thumb_direction
+)
+
+MIDDLE_FINGER_MCP = 9
+# Index pairs (i <= j) of the ten extension features, for their pairwise products
+_UPPER_ROWS, _UPPER_COLUMNS = np.triu_indices(10)
+# Label a model uses for "no gesture"; predictions with it come back as None
+NO_GESTURE = -1
+
+
+# Pose features that do not depend on where the hand is, how big it is, how it is
+# tilted in the image or which hand it is: the landmarks are moved to the wrist,
+# scaled by the palm length (wrist to middle finger MCP), rotated so the palm points
+# up and mirrored so left hands look like right ones. To those 60 coordinates come
+# how far each tip is from the wrist, absolute and relative to its joint, which is
+# what separates a straight finger from a curled one whatever the hand's
+# orientation, and the pairwise products of those ten, so a linear model can also
+# learn classes like "no gesture" that are made of both the fewest and the most
+# extended fingers. Works on one hand (21, 3) -> (F,) or a batch (N, 21, 3) -> (N, F).
+def landmark_features(points, handedness=None):
+    points = np.asarray(points, dtype=np.float32)
+    centered = points - points[..., WRIST:WRIST + 1, :]
+    palm = centered[..., MIDDLE_FINGER_MCP, :2]
+    palm_length = np.maximum(np.linalg.norm(palm, axis=-1), 1e-6)
+    up_x = palm[..., 0] / palm_length
+    up_y = palm[..., 1] / palm_length
+
+    # Palm direction becomes (0, -1); x is then mirrored for left hands
+    x = centered[..., 0]
+    y = centered[..., 1]
+    direction = np.asarray(thumb_direction(handedness), dtype=np.float32)[..., None]
+    scale = 1.0 / palm_length[..., None]
+    aligned = np.empty(points.shape[:-2] + (NUM_LANDMARKS - 1, 3), dtype=np.float32)
+    aligned[..., 0] = ((x * -up_y[..., None] + y * up_x[..., None]) * scale * direction)[..., 1:]
+    aligned[..., 1] = (-(x * up_x[..., None] + y * up_y[..., None]) * scale)[..., 1:]
+    aligned[..., 2] = (centered[..., 2] * scale)[..., 1:]
+
+    # aligned has no wrist row, so landmark i is at i - 1
+    reach = np.linalg.norm(aligned[..., FINGER_TIPS - 1, :2], axis=-1)
+    joints = np.linalg.norm(aligned[..., FINGER_JOINTS - 1, :2], axis=-1)
+    extension = np.concatenate([reach, reach / np.maximum(joints, 1e-6)], axis=-1)
+    pairs = (extension[..., :, None] * extension[..., None, :])[..., _UPPER_ROWS, _UPPER_COLUMNS]
+    return np.concatenate([aligned.reshape(aligned.shape[:-2] + (-1,)), extension, pairs], axis=-1)
+
+
+# Multinomial logistic regression over landmark_features, in plain numpy. The model
+# file is a few KB: the feature standardisation, one weight matrix and the labels.
+class GestureModel:
+    def __init__(self, mean, scale, weights, bias, labels):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = np.asarray(labels, dtype=np.int64)
+        # Standardisation folded into the weights, so inference is one matrix product
+        self._weights = self.weights / self.scale[:, None]
+        self._bias = self.bias - (self.mean / self.scale) @ self.weights
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["mean"], data["scale"], data["weights"], data["bias"], data["labels"])
+
+    def save(self, path):
+        # Written to a file object so np.savez does not append ".npz" to the name
+        with open(path, "wb") as f:
+            np.savez(f, mean=self.mean, scale=self.scale, weights=self.weights,
+                     bias=self.bias, labels=self.labels)
+
+    def scores(self, points, handedness=None):
+        return landmark_features(points, handedness) @ self._weights + self._bias
+
+    def predict(self, points, handedness=None):
+        # Labels for one hand or a batch; NO_GESTURE where nothing was recognised
+        return self.labels[np.argmax(self.scores(points, handedness), axis=-1)]
+
+    def classify(self, points, handedness=None):
+        # One hand -> gesture id or None, the same contract as VideoThread.detect_gesture
+        label = int(self.predict(points, handedness))
+        return None if label == NO_GESTURE else label
+
+
+def train_gesture_model(points, labels, handedness=None, epochs=500, learning_rate=0.5, l2=1e-4):
+    # Full-batch gradient descent on the softmax cross-entropy; fine for the few
+    # thousand hands a recorded class session gives
+    features = landmark_features(points, handedness).astype(np.float64)
+    labels = np.asarray(labels)
+    classes, targets = np.unique(labels, return_inverse=True)
+    mean = features.mean(axis=0)
+    scale = features.std(axis=0) + 1e-6
+    standardized = (features - mean) / scale
+
+    count = len(standardized)
+    weights = np.zeros((standardized.shape[1], len(classes)))
+    bias = np.zeros(len(classes))
+    one_hot = np.eye(len(classes))[targets]
+    for _ in range(epochs):
+        logits = standardized @ weights + bias
+        logits -= logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        error = (probabilities - one_hot) / count
+        weights -= learning_rate * (standardized.T @ error + l2 * weights)
+        bias -= learning_rate * error.sum(axis=0)
+    return GestureModel(mean, scale, weights, bias, classes)
+
+
+# Training data comes from recorded sessions: landmark recordings (.gstl, see
+# recording.py) with a labels file next to them, SESSION.gstl -> SESSION.labels.json,
+# or .npz files with `points` (N, 21, 3), `labels` (N,) and optionally `handedness`
+# (N,) labels, e.g. exported from another tool.
+def load_training_data(paths):
+    points, labels, handedness = [], [], []
+    for path in paths:
+        if path.endswith(".gstl"):
+            from recording import labelled_hands, load_labels, open_recording
+            records, _ = open_recording(path)
+            hands, gestures, hands_handedness = labelled_hands(records, load_labels(labels_path(path)))
+            points.append(hands)
+            labels.append(gestures)
+            handedness.extend(hands_handedness)
+            continue
+        with np.load(path, allow_pickle=False) as data:
+            points.append(data["points"])
+            labels.append(data["labels"])
+            if "handedness" in data:
+                handedness.extend(data["handedness"].tolist())
+            else:
+                handedness.extend(["Right"] * len(data["labels"]))
+    return np.concatenate(points), np.concatenate(labels), handedness
+
+
+def labels_path(recording_path):
+    return os.path.splitext(recording_path)[0] + ".labels.json"
+
+
+def main(argv):
+    # python gesture_model.py OUTPUT.npz SESSION.gstl|DATA.npz [...]
+    # python gesture_model.py OUTPUT.npz --synthetic N
+    if len(argv) < 2:
+        print("usage: gesture_model.py OUTPUT.npz (SESSION.gstl | DATA.npz ... | --synthetic N)")
+        return 2
+    output, sources = argv[0], argv[1:]
+    if sources[0] == "--synthetic":
+        from synthetic_hands import synthetic_dataset
+        points, labels, handedness = synthetic_dataset(int(sources[1]) if len(sources) > 1 else 5000)
+    else:
+        points, labels, handedness = load_training_data(sources)
+        if len(labels) == 0:
+            print("No labelled hands in the training data")
+            return 1
+        counts = ", ".join(f"{'none' if label == NO_GESTURE else 'ABCD'[label]} {count}"
+                           for label, count in zip(*np.unique(labels, return_counts=True)))
+        print(f"training data: {counts}")
+
+    model = train_gesture_model(points, labels, handedness)
+    model.save(output)
+    accuracy = np.mean(model.predict(points, handedness) == labels)
+    print(f"trained on {len(labels)} hands, training accuracy {accuracy:.3f}, saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
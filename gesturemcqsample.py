@@ -1,6 +1,7 @@
 import cv2
 import mediapipe as mp
 import pyautogui
+from landmarks import as_landmark_array, count_extended_fingers, handedness_labels
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
@@ -32,23 +33,10 @@ def display_question():
 
 
 # Define gesture-to-action mapping
-def interpret_gesture(landmarks):
-    index_tip = landmarks[mp_hands.HandLandmark.INDEX_FINGER_TIP]
-    middle_tip = landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_TIP]
-    ring_tip = landmarks[mp_hands.HandLandmark.RING_FINGER_TIP]
-    pinky_tip = landmarks[mp_hands.HandLandmark.PINKY_TIP]
-    thumb_tip = landmarks[mp_hands.HandLandmark.THUMB_TIP]
-
-    # Determine the number of fingers raised
-    fingers = [
-        thumb_tip.x < landmarks[mp_hands.HandLandmark.THUMB_IP].x,
-        index_tip.y < landmarks[mp_hands.HandLandmark.INDEX_FINGER_PIP].y,
-        middle_tip.y < landmarks[mp_hands.HandLandmark.MIDDLE_FINGER_PIP].y,
-        ring_tip.y < landmarks[mp_hands.HandLandmark.RING_FINGER_PIP].y,
-        pinky_tip.y < landmarks[mp_hands.HandLandmark.PINKY_PIP].y
-    ]
-
-    finger_count = sum(fingers)
+def interpret_gesture(landmarks, handedness=None):
+    # Determine the number of fingers raised, in one vectorized pass over the (21, 3)
+    # landmark array; the thumb test follows the hand's handedness when it is known
+    finger_count = int(count_extended_fingers(as_landmark_array(landmarks), handedness))
 
     if finger_count == 1:
         return 1
@@ -81,13 +69,14 @@ try:
         results = hands.process(rgb_frame)
 
         if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
+            handedness = handedness_labels(results)
+            for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
                 # Draw hand landmarks on the frame
                 mp_drawing.draw_landmarks(
                     frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
 
                 # Interpret gestures
-                gesture = interpret_gesture(hand_landmarks.landmark)
+                gesture = interpret_gesture(hand_landmarks.landmark, handedness[i] if i < len(handedness) else None)
 
                 if gesture in [1, 2, 3, 4]:
                     selected_option = gesture
@@ -0,0 +1,55 @@
+import time
+
+
+# Decides how long the inference loop should rest after each frame.
+#
+# While a hand is in view the loop period is stretched just enough that the measured
+# work stays within cpu_budget (the fraction of one core the loop may use), so fast
+# machines run at camera rate and slow ones stop pegging the CPU. Once no hand has
+# been seen for idle_after seconds the loop drops to idle_fps, and it goes back to
+# full rate on the first frame that has a hand in it again.
+class FrameRateGovernor:
+    def __init__(self, cpu_budget=0.6, max_fps=None, idle_fps=5.0, idle_after=3.0, smoothing=0.2):
+        self.cpu_budget = cpu_budget
+        self.max_fps = max_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.smoothing = smoothing
+        # Exponential moving average of the work done per frame, in seconds
+        self.work_time = None
+        self.idle = False
+        self.last_hand_time = time.monotonic()
+        self._frame_start = None
+
+    def frame_started(self):
+        self._frame_start = time.monotonic()
+
+    def frame_finished(self, hand_present):
+        # Returns the number of seconds to sleep before picking up the next frame
+        now = time.monotonic()
+        work = now - self._frame_start if self._frame_start is not None else 0.0
+        if self.work_time is None:
+            self.work_time = work
+        else:
+            self.work_time += self.smoothing * (work - self.work_time)
+
+        if hand_present:
+            self.last_hand_time = now
+        self.idle = now - self.last_hand_time > self.idle_after
+
+        return max(0.0, self.period() - work)
+
+    def period(self):
+        period = 0.0
+        if self.work_time and self.cpu_budget:
+            period = self.work_time / self.cpu_budget
+        if self.max_fps:
+            period = max(period, 1.0 / self.max_fps)
+        if self.idle and self.idle_fps:
+            period = max(period, 1.0 / self.idle_fps)
+        return period
+
+    @property
+    def fps(self):
+        period = self.period()
+        return 1.0 / period if period else float("inf")
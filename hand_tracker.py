@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+
+# Process-wide owner of the MediaPipe Hands model.
+#
+# The model is built once (by the factory passed in) and reused by every quiz, instead
+# of each VideoThread constructing its own. warm_up() loads it on a background thread
+# and runs a dummy frame through it, so by the time a student opens a quiz the first
+# detection is not paying for model load and graph initialisation. The MediaPipe graph
+# is not thread-safe, so it is leased to one user at a time:
+#
+#     with hand_tracker.lease() as hands:
+#         results = hands.process(rgb_frame)
+class HandTrackerService:
+    def __init__(self, factory, warm_up_size=(256, 256)):
+        self.factory = factory
+        self.warm_up_size = warm_up_size
+        self.hands = None
+        self.warm = False
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+
+    def warm_up(self):
+        # Safe to call more than once; only the first call starts a thread
+        if self.warm or self._warm_up_thread is not None:
+            return
+        self._warm_up_thread = threading.Thread(target=self._warm_up, name="HandTrackerWarmUp", daemon=True)
+        self._warm_up_thread.start()
+
+    def _warm_up(self):
+        with self._lock:
+            self._load()
+            if not self.warm:
+                w, h = self.warm_up_size
+                self.hands.process(np.zeros((h, w, 3), dtype=np.uint8))
+                self.warm = True
+
+    def _load(self):
+        if self.hands is None:
+            self.hands = self.factory()
+        return self.hands
+
+    def lease(self):
+        return HandTrackerLease(self)
+
+    def close(self):
+        with self._lock:
+            if self.hands is not None:
+                self.hands.close()
+                self.hands = None
+                self.warm = False
+            self._warm_up_thread = None
+
+
+# Exclusive use of the shared model for the lifetime of a with-block. Entering waits
+# for a warm-up that is still in progress rather than building a second model.
+class HandTrackerLease:
+    def __init__(self, service):
+        self.service = service
+
+    def __enter__(self):
+        self.service._lock.acquire()
+        try:
+            return self.service._load()
+        except BaseException:
+            self.service._lock.release()
+            raise
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.service._lock.release()
+        return False
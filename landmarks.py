@@ -0,0 +1,111 @@
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+# Landmark indices, matching mp.solutions.hands.HandLandmark
+WRIST = 0
+THUMB_IP = 3
+THUMB_TIP = 4
+INDEX_FINGER_PIP = 6
+INDEX_FINGER_TIP = 8
+MIDDLE_FINGER_PIP = 10
+MIDDLE_FINGER_TIP = 12
+RING_FINGER_PIP = 14
+RING_FINGER_TIP = 16
+PINKY_PIP = 18
+PINKY_TIP = 20
+
+# Thumb, index, middle, ring, pinky: the tip of each finger and the joint it is compared to
+FINGER_TIPS = np.array([THUMB_TIP, INDEX_FINGER_TIP, MIDDLE_FINGER_TIP, RING_FINGER_TIP, PINKY_TIP])
+FINGER_JOINTS = np.array([THUMB_IP, INDEX_FINGER_PIP, MIDDLE_FINGER_PIP, RING_FINGER_PIP, PINKY_PIP])
+
+
+# Copies one MediaPipe hand into a (21, 3) float32 array of normalized x, y, z
+# coordinates. Accepts a NormalizedLandmarkList or its .landmark sequence.
+def landmarks_to_array(hand_landmarks, out=None):
+    if out is None:
+        out = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    landmarks = getattr(hand_landmarks, "landmark", hand_landmarks)
+    out[:] = [(lm.x, lm.y, lm.z) for lm in landmarks]
+    return out
+
+
+def as_landmark_array(hand):
+    # Arrays (one hand or a batch) pass through; MediaPipe landmarks are converted
+    if isinstance(hand, np.ndarray):
+        return hand
+    return landmarks_to_array(hand)
+
+
+# MediaPipe handedness labels ("Left"/"Right") for each hand in a results object
+def handedness_labels(results):
+    if not results.multi_handedness:
+        return []
+    return [hand.classification[0].label for hand in results.multi_handedness]
+
+
+# How sure MediaPipe is of each of those labels, 0-1
+def handedness_scores(results):
+    if not results.multi_handedness:
+        return []
+    return [hand.classification[0].score for hand in results.multi_handedness]
+
+
+def thumb_direction(handedness):
+    # +1 where the thumb extends towards smaller x (right hands in the mirrored
+    # selfie view), -1 for left hands. Unknown handedness counts as a right hand,
+    # which is what the original single-hand rule assumed.
+    if handedness is None:
+        return 1.0
+    if isinstance(handedness, str):
+        return -1.0 if handedness == "Left" else 1.0
+    labels = np.asarray(handedness)
+    if labels.dtype.kind in "US":
+        return np.where(labels == "Left", -1.0, 1.0).astype(np.float32)
+    return labels.astype(np.float32)
+
+
+# Which fingers are extended, for one hand (21, 3) -> (5,) or a batch (N, 21, 3) -> (N, 5),
+# in thumb, index, middle, ring, pinky order. A finger is extended when its tip is above
+# its PIP joint; the thumb when its tip is further out sideways than its IP joint, in the
+# direction given by the hand's handedness.
+def extended_fingers(points, handedness=None):
+    points = np.asarray(points, dtype=np.float32)
+    extended = np.empty(points.shape[:-2] + (5,), dtype=bool)
+    # Tips 8, 12, 16, 20 against PIP joints 6, 10, 14, 18, as strided views
+    np.less(points[..., INDEX_FINGER_TIP::4, 1], points[..., INDEX_FINGER_PIP:PINKY_PIP + 1:4, 1],
+            out=extended[..., 1:])
+    thumb_reach = (points[..., THUMB_IP, 0] - points[..., THUMB_TIP, 0]) * thumb_direction(handedness)
+    np.greater(thumb_reach, 0, out=extended[..., 0])
+    return extended
+
+
+def count_extended_fingers(points, handedness=None):
+    return extended_fingers(points, handedness).sum(axis=-1)
+
+
+# The answer rule: 1-4 extended fingers select options A-D (0-3); anything else is None
+def finger_count_gesture(points, handedness=None):
+    extended = int(count_extended_fingers(points, handedness))
+    if 1 <= extended <= 4:
+        return extended - 1
+    return None
+
+
+# Preallocated (max_hands, 21, 3) array that the landmarks of every frame are copied
+# into, so later stages work on plain arrays instead of protobuf objects
+class LandmarkBuffer:
+    def __init__(self, max_hands=2):
+        self.points = np.zeros((max_hands, NUM_LANDMARKS, 3), dtype=np.float32)
+        self.count = 0
+
+    def fill(self, multi_hand_landmarks):
+        self.count = 0
+        for hand_landmarks in (multi_hand_landmarks or [])[:len(self.points)]:
+            landmarks_to_array(hand_landmarks, out=self.points[self.count])
+            self.count += 1
+        return self.hands
+
+    @property
+    def hands(self):
+        return self.points[:self.count]
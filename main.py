@@ -1,187 +1,78 @@
+import argparse
+import os
 import sys
 import sqlite3
 import hashlib
 import json
-import cv2
-import mediapipe as mp
-import numpy as np
+import threading
 import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QMessageBox,
     QStackedWidget, QListWidget, QListWidgetItem, QLineEdit, QFormLayout, QDialog, QComboBox,
-    QTextEdit, QGridLayout, QRadioButton, QButtonGroup, QSpinBox, QScrollArea, QFrame ,QTabWidget
+    QTextEdit, QGridLayout, QRadioButton, QButtonGroup, QSpinBox, QScrollArea, QFrame ,QTabWidget, QShortcut,
+    QFileDialog, QInputDialog, QProgressDialog
 )
-from PyQt5.QtGui import QFont, QIcon, QImage, QPixmap
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
+from PyQt5.QtGui import QFont, QIcon, QPixmap, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QEvent, QThread, pyqtSignal
 
-# Initialize MediaPipe Hands
-mp_hands = mp.solutions.hands
-mp_drawing = mp.solutions.drawing_utils
-hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+import database
+import profiling
+import question_import
 
-# Database Setup
-def initialize_database():
-    conn = sqlite3.connect('gestura.db')
-    cursor = conn.cursor()
-    
-    # Create tables if they don't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL
-    )
-    ''')
+# The video pipeline pulls in cv2, mediapipe and numpy, which take most of a second to
+# import. It is only loaded when a gesture quiz needs it, or in the background right
+# after a student logs in, so the login screen and the teacher screens never wait for it.
+def load_video_module():
+    import video_thread
+    return video_thread
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS quizzes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        teacher_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        FOREIGN KEY (teacher_id) REFERENCES users (id)
-    )
-    ''')
+# Set from a student's login until logout or quit, so a preload that is still
+# importing when the session ends neither warms the model up nor opens the camera
+video_session = threading.Event()
+preload_thread = None
 
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS questions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        quiz_id INTEGER NOT NULL,
-        question_text TEXT NOT NULL,
-        options TEXT NOT NULL,
-        correct_answer INTEGER NOT NULL,
-        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS results (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id INTEGER NOT NULL,
-        quiz_id INTEGER NOT NULL,
-        score INTEGER NOT NULL,
-        total_questions INTEGER NOT NULL,
-        FOREIGN KEY (student_id) REFERENCES users (id),
-        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-    )
-    ''')
+def preload_video_module():
+    global preload_thread
+    video_session.set()
+    def preload():
+        video = load_video_module()
+        if video_session.is_set():
+            video.hand_tracker.warm_up()
+        if video_session.is_set():
+            video.camera_manager.open_async()
+    preload_thread = threading.Thread(target=preload, name="VideoPreload", daemon=True)
+    preload_thread.start()
+
+def release_video_resources(close_model=False):
+    global preload_thread
+    video_session.clear()
+    # A preload may still be importing video_thread; its module is only complete, and
+    # any camera open it started only cancellable, once the preload has returned
+    if preload_thread is not None:
+        preload_thread.join()
+        preload_thread = None
+    # Nothing to release if no gesture quiz was ever started
+    video = sys.modules.get("video_thread")
+    if video is not None:
+        video.camera_manager.close()
+        if close_model:
+            video.hand_tracker.close()
 
-    conn.commit()
+# Database Setup
+def initialize_database():
+    # Creates the tables on first start and applies any schema changes made since
+    # (see database.MIGRATIONS)
+    conn = get_db_connection()
+    database.migrate(conn)
     return conn
 
 def get_db_connection():
-    return sqlite3.connect('gestura.db')
+    # This thread's pooled connection; close() hands it back (see database.py)
+    return database.get_connection()
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
-# Video processing thread class
-class VideoThread(QThread):
-    update_frame = pyqtSignal(QImage)
-    gesture_detected = pyqtSignal(int)
-    
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.running = False
-        self.cap = None
-        self.gesture_cooldown = False
-        self.last_gesture_time = 0
-        self.cooldown_duration = 2  # seconds
-    
-    def run(self):
-        self.running = True
-        self.cap = cv2.VideoCapture(0)
-        
-        with mp_hands.Hands(
-            min_detection_confidence=0.7,
-            min_tracking_confidence=0.5) as hands:
-            
-            while self.running:
-                ret, frame = self.cap.read()
-                if not ret:
-                    break
-                
-                # Flip the frame horizontally for a later selfie-view display
-                frame = cv2.flip(frame, 1)
-                
-                # Convert the BGR image to RGB
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                
-                # Process the frame with MediaPipe Hands
-                results = hands.process(rgb_frame)
-                
-                # Draw hand landmarks on the frame
-                if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
-                        mp_drawing.draw_landmarks(
-                            frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-                        
-                        # Check if we can detect a gesture now
-                        current_time = time.time()
-                        if not self.gesture_cooldown or current_time - self.last_gesture_time > self.cooldown_duration:
-                            # Get gesture
-                            gesture = self.detect_gesture(hand_landmarks)
-                            if gesture is not None:
-                                self.gesture_detected.emit(gesture)
-                                self.gesture_cooldown = True
-                                self.last_gesture_time = current_time
-                
-                # Add help text
-                cv2.putText(frame, "Gestures: 1 finger (A), 2 fingers (B), 3 fingers (C), 4 fingers (D)", 
-                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Convert to Qt format
-                h, w, ch = frame.shape
-                qt_image = QImage(frame.data, w, h, ch * w, QImage.Format_RGB888)
-                
-                # Emit signal
-                self.update_frame.emit(qt_image.rgbSwapped())
-                
-                # Sleep to reduce CPU usage
-                self.msleep(30)
-    
-    def detect_gesture(self, hand_landmarks):
-        # Count extended fingers
-        extended_fingers = 0
-        
-        # Get finger tip and pip (middle joint) landmarks
-        tips = [hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]]
-        
-        pips = [hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_IP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP]]
-        
-        # Get wrist landmark
-        wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
-        
-        # Check each finger (simplified for demo - just checking if tip is above pip on y-axis)
-        # For the thumb, check if it's to the side (x-axis)
-        for i in range(5):
-            if i == 0:  # Thumb
-                if tips[i].x < pips[i].x:  # For right hand
-                    extended_fingers += 1
-            else:  # Other fingers
-                if tips[i].y < pips[i].y:
-                    extended_fingers += 1
-        
-        # Map to answer choices (1-4 fingers = options A-D)
-        if 1 <= extended_fingers <= 4:
-            return extended_fingers - 1  # Return 0 for A, 1 for B, etc.
-        else:
-            return None  # No recognized gesture
-    
-    def stop(self):
-        self.running = False
-        if self.cap:
-            self.cap.release()
-        self.wait()
-
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -393,15 +284,12 @@ class CreateQuizDialog(QDialog):
             quiz_id = cursor.lastrowid
             
             # Insert questions
-            for i, q in enumerate(self.questions):
-                question_text = q['text'].text()
-                options = [opt.text() for opt in q['options']]
-                correct_answer = q['correct_answer'].checkedId()
-                
-                cursor.execute(
-                    "INSERT INTO questions (quiz_id, question_text, options, correct_answer) VALUES (?, ?, ?, ?)",
-                    (quiz_id, question_text, json.dumps(options), correct_answer)
-                )
+            cursor.executemany(
+                "INSERT INTO questions (quiz_id, question_text, options, correct_answer) VALUES (?, ?, ?, ?)",
+                [(quiz_id, q['text'].text(), json.dumps([opt.text() for opt in q['options']]),
+                  q['correct_answer'].checkedId())
+                 for q in self.questions]
+            )
             
             conn.commit()
             QMessageBox.information(self, "Success", "Quiz created successfully")
@@ -412,6 +300,48 @@ class CreateQuizDialog(QDialog):
         finally:
             conn.close()
 
+# Imports a question bank (see question_import.py) off the GUI thread. The import runs
+# in one transaction on the thread's own connection, so a cancelled or failed import
+# leaves nothing behind.
+class QuestionImportThread(QThread):
+    # imported, skipped, fraction of the file read
+    progress = pyqtSignal(int, int, float)
+    imported = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, path, teacher_id, title, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.teacher_id = teacher_id
+        self.title = title
+        self.cancel_requested = False
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def run(self):
+        try:
+            with profiling.profile_thread("import"):
+                result = question_import.import_question_bank(
+                    get_db_connection(), self.path, self.teacher_id, self.title,
+                    progress=self.progress.emit, cancelled=lambda: self.cancel_requested)
+            self.imported.emit(result)
+        except question_import.ImportCancelled:
+            self.failed.emit("Import cancelled, nothing was saved")
+        except Exception as e:
+            self.failed.emit(f"Import failed, nothing was saved: {e}")
+        finally:
+            database.pool.release()
+
+# Option labels for the finger-count gestures, and how long a selected answer stays
+# on screen before the quiz moves on to the next question
+OPTION_GESTURE_TEXTS = ["A (Index finger)", "B (Two fingers)", "C (Three fingers)", "D (Four fingers)"]
+AUTO_ADVANCE_MS = 700
+# Per-stage pipeline timings can be shown over the camera view (F3, or from the start
+# with GESTURA_TIMING_OVERLAY=1). With GESTURA_TIMING_DIR set, every quiz also writes
+# a JSON summary of them into that directory when it closes.
+TIMING_OVERLAY_INTERVAL_MS = 500
+
 class GestureQuizDialog(QDialog):
     def __init__(self, student_id, quiz_id, quiz_title, parent=None):
         super().__init__(parent)
@@ -508,6 +438,12 @@ class GestureQuizDialog(QDialog):
         self.camera_view.setAlignment(Qt.AlignCenter)
         self.camera_view.setStyleSheet("border: 2px solid #888; background-color: #000;")
         camera_layout.addWidget(self.camera_view)
+
+        self.timing_overlay = QLabel(self.camera_view)
+        self.timing_overlay.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 170); color: #7f7; font-family: monospace; font-size: 10px; padding: 3px;")
+        self.timing_overlay.move(4, 4)
+        self.timing_overlay.hide()
         
         self.gesture_status = QLabel("Waiting for gesture...")
         self.gesture_status.setAlignment(Qt.AlignCenter)
@@ -519,11 +455,24 @@ class GestureQuizDialog(QDialog):
         self.setLayout(main_layout)
         
         # Initialize video capture thread
-        self.video_thread = VideoThread()
-        self.video_thread.update_frame.connect(self.update_camera_view)
+        self.video_thread = load_video_module().VideoThread()
+        self.video_thread.frame_delivery.frame_ready.connect(self.update_camera_view)
         self.video_thread.gesture_detected.connect(self.handle_gesture)
+        self.video_thread.gesture_tentative.connect(self.handle_tentative_gesture)
         self.video_thread.start()
         
+        # One pending advance at a time; a new selection restarts it
+        self.advance_timer = QTimer(self)
+        self.advance_timer.setSingleShot(True)
+        self.advance_timer.timeout.connect(self.auto_advance)
+
+        self.timing_timer = QTimer(self)
+        self.timing_timer.timeout.connect(self.update_timing_overlay)
+        QShortcut(QKeySequence("F3"), self, activated=self.toggle_timing_overlay)
+        if os.environ.get("GESTURA_TIMING_OVERLAY", "0") == "1":
+            self.toggle_timing_overlay()
+        self.timings_saved = False
+        
         # Display first question
         self.display_question(0)
         
@@ -590,9 +539,9 @@ class GestureQuizDialog(QDialog):
         
         q_id = self.questions[self.current_question_idx][0]
         
-        # Find selected option
+        # Find selected option; buttons beyond the question's options are hidden
         for i, opt in enumerate(self.option_buttons):
-            if opt.isChecked():
+            if opt.isChecked() and not opt.isHidden():
                 self.user_answers[q_id] = i
                 break
     
@@ -628,7 +577,7 @@ class GestureQuizDialog(QDialog):
         conn.close()
         
         # Stop video thread
-        self.video_thread.stop()
+        self.stop_video()
         
         # Show result
         QMessageBox.information(self, "Quiz Result", 
@@ -636,17 +585,52 @@ class GestureQuizDialog(QDialog):
         
         self.accept()
     
-    def update_camera_view(self, image):
-        self.camera_view.setPixmap(QPixmap.fromImage(image).scaled(
-            self.camera_view.width(), self.camera_view.height(), 
-            Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def update_camera_view(self):
+        image = self.video_thread.frame_delivery.take()
+        if image is None:
+            return
+        # Frames arrive already sized for camera_view, so no rescaling on the GUI thread
+        self.camera_view.setPixmap(QPixmap.fromImage(image))
+
+    def update_preview_state(self):
+        # Only ask the worker for preview frames that can actually be seen
+        view = self.camera_view.contentsRect()
+        self.video_thread.preview.set_target_size(view.width(), view.height())
+        self.video_thread.preview.set_visible(self.isVisible() and not self.isMinimized())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_preview_state()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_preview_state()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_preview_state()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.WindowStateChange:
+            self.update_preview_state()
+    
+    def option_count(self):
+        # Imported questions may have 2 or 3 options; gestures for the others are ignored
+        if not self.questions:
+            return 0
+        return len(json.loads(self.questions[self.current_question_idx][2]))
+    
+    def handle_tentative_gesture(self, gesture_id):
+        # The worker has seen this gesture but is waiting for it to be held a moment longer
+        if 0 <= gesture_id < self.option_count():
+            self.gesture_status.setText(f"Hold for Option {OPTION_GESTURE_TEXTS[gesture_id]}...")
+            self.gesture_status.setStyleSheet("font-size: 14px; font-weight: bold; color: #cc8800; padding: 5px;")
     
     def handle_gesture(self, gesture_id):
-        # Map gesture to an option (0-3)
-        option_texts = ["A (Index finger)", "B (Two fingers)", "C (Three fingers)", "D (Four fingers)"]
-        
-        if 0 <= gesture_id <= 3:
-            self.gesture_status.setText(f"Detected: Option {option_texts[gesture_id]}")
+        # Map gesture to one of the question's options (0-3)
+        if 0 <= gesture_id < self.option_count():
+            self.gesture_status.setText(f"Detected: Option {OPTION_GESTURE_TEXTS[gesture_id]}")
             self.gesture_status.setStyleSheet("font-size: 14px; font-weight: bold; color: green; padding: 5px;")
             
             # Select the corresponding radio button
@@ -655,8 +639,9 @@ class GestureQuizDialog(QDialog):
             # Save the answer
             self.save_current_answer()
             
-            # Optional: Auto-advance to next question after a short delay
-            QTimer.singleShot(1500, lambda: self.auto_advance())
+            # Auto-advance to the next question after a short delay. The selection is
+            # already debounced by the worker, so this only leaves time to see it
+            self.advance_timer.start(AUTO_ADVANCE_MS)
     
     def auto_advance(self):
         # Auto-advance to next question if there is one
@@ -667,9 +652,57 @@ class GestureQuizDialog(QDialog):
             self.submit_button.setStyleSheet("background-color: #ff9900;")
             QTimer.singleShot(1000, lambda: self.submit_button.setStyleSheet(""))
     
+    def toggle_timing_overlay(self):
+        show = self.timing_overlay.isHidden()
+        self.timing_overlay.setVisible(show)
+        if show:
+            self.update_timing_overlay()
+            self.timing_timer.start(TIMING_OVERLAY_INTERVAL_MS)
+        else:
+            self.timing_timer.stop()
+
+    def update_timing_overlay(self):
+        # Only the worker writes the histograms, so they are read here without a lock
+        self.timing_overlay.setText(self.video_thread.timings.overlay_text())
+        self.timing_overlay.adjustSize()
+        self.timing_overlay.raise_()
+
+    def stop_video(self):
+        self.advance_timer.stop()
+        self.timing_timer.stop()
+        self.video_thread.stop()
+        if self.timings_saved:
+            return
+        self.timings_saved = True
+        directory = os.environ.get("GESTURA_TIMING_DIR")
+        if not directory:
+            return
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, time.strftime(f"quiz{self.quiz_id}-%Y%m%d-%H%M%S.json"))
+            # How long the camera took to open, to deliver its first frame and to
+            # resume for this quiz; None for what was never measured
+            camera = self.video_thread.camera
+            self.video_thread.timings.save(
+                path, quiz_id=self.quiz_id,
+                frames_dropped=self.video_thread.frames_dropped,
+                frames_coalesced=self.video_thread.frames_coalesced,
+                camera_open_seconds=camera.open_seconds if camera else None,
+                camera_first_frame_seconds=camera.first_frame_seconds if camera else None,
+                camera_resume_seconds=camera.resume_latency if camera else None)
+        except OSError:
+            # Diagnostics only; the quiz itself is unaffected
+            pass
+
+    def done(self, result):
+        # accept() and reject() (Esc) end up here without a closeEvent; the worker holds
+        # the hand model and the camera until it is stopped, so every exit stops it
+        self.stop_video()
+        super().done(result)
+    
     def closeEvent(self, event):
         # Stop video thread when dialog closes
-        self.video_thread.stop()
+        self.stop_video()
         event.accept()
 
 class QuizWidget(QWidget):
@@ -705,6 +738,10 @@ class QuizWidget(QWidget):
             self.create_quiz_button = QPushButton("Create New Quiz")
             self.create_quiz_button.clicked.connect(self.create_quiz)
             button_layout.addWidget(self.create_quiz_button)
+            
+            self.import_quiz_button = QPushButton("Import Questions")
+            self.import_quiz_button.clicked.connect(self.import_quiz)
+            button_layout.addWidget(self.import_quiz_button)
         
         layout.addLayout(button_layout)
         
@@ -767,6 +804,55 @@ class QuizWidget(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             self.load_quizzes()
     
+    def import_quiz(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Import Questions", "",
+            "Question banks (*.csv *.json *.jsonl *.xml);;CSV (*.csv);;JSON (*.json *.jsonl);;Moodle XML (*.xml)")
+        if not path:
+            return
+        default_title = os.path.splitext(os.path.basename(path))[0]
+        title, ok = QInputDialog.getText(self, "Import Questions", "Quiz Title:", QLineEdit.Normal, default_title)
+        if not ok or not title.strip():
+            return
+        
+        self.import_quiz_button.setEnabled(False)
+        progress = QProgressDialog("Importing questions...", "Cancel", 0, 1000, self)
+        progress.setWindowTitle("Import Questions")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        
+        self.import_thread = QuestionImportThread(path, self.user_id, title.strip(), self)
+        
+        def update(imported, skipped, done):
+            progress.setValue(int(done * 1000))
+            progress.setLabelText(f"{imported} questions imported, {skipped} skipped")
+        
+        def finish():
+            progress.close()
+            self.import_quiz_button.setEnabled(True)
+            self.load_quizzes()
+        
+        def imported(result):
+            finish()
+            message = f"Imported {result.imported} questions into \"{title.strip()}\" in {result.seconds:.1f}s."
+            if result.skipped:
+                message += f"\n\n{result.skipped} questions were skipped:\n" + "\n".join(result.errors)
+                if result.skipped > len(result.errors):
+                    message += "\n..."
+            QMessageBox.information(self, "Import Questions", message)
+        
+        def failed(error):
+            finish()
+            QMessageBox.warning(self, "Import Questions", error)
+        
+        self.import_thread.progress.connect(update)
+        self.import_thread.imported.connect(imported)
+        self.import_thread.failed.connect(failed)
+        progress.canceled.connect(self.import_thread.cancel)
+        self.import_thread.start()
+    
     def take_gesture_quiz(self, quiz_id, quiz_title):
         # Check if student has already taken this quiz
         conn = get_db_connection()
@@ -1013,6 +1099,7 @@ class HelpWidget(QWidget):
         <h3>For Teachers:</h3>
         <ul>
             <li><b>Create Quizzes:</b> Click "Create New Quiz" in the Quiz tab.</li>
+            <li><b>Import Questions:</b> Click "Import Questions" to turn a CSV, JSON or Moodle XML question bank into a quiz.</li>
             <li><b>View Quiz Details:</b> Double-click on your quiz to see questions and student results.</li>
             <li><b>Monitor Performance:</b> See all student results in the Results tab.</li>
         </ul>
@@ -1022,8 +1109,8 @@ class HelpWidget(QWidget):
             <li>Ensure good lighting for better gesture recognition.</li>
             <li>Hold your hand clearly in the camera's view.</li>
             <li>Keep fingers straight and clearly separated.</li>
-            <li>Hold the gesture for 1-2 seconds to register.</li>
-            <li>After a gesture is recognized, there's a 2-second cooldown.</li>
+            <li>Hold the gesture until the status turns green to register it.</li>
+            <li>To choose the same option again, lower your hand or change gesture first.</li>
         </ul>
         """)
         layout.addWidget(help_text)
@@ -1060,6 +1147,10 @@ class MainWindow(QMainWindow):
         # Update window title to show logged in user
         self.setWindowTitle(f"Gestura - Logged in as {self.username} ({self.user_role})")
         
+        # Students take gesture quizzes, so get the hand model and camera ready while they pick one
+        if self.user_role == "student":
+            preload_video_module()
+        
         # Create central widget with tabs
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
@@ -1089,6 +1180,9 @@ class MainWindow(QMainWindow):
         main_layout.addWidget(self.logout_button)
     
     def logout(self):
+        # Release the camera until the next student logs in
+        release_video_resources()
+        
         # Reset user info
         self.user_id = None
         self.user_role = None
@@ -1102,7 +1196,20 @@ class MainWindow(QMainWindow):
         self.show_login()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # --profile DIR (or GESTURA_PROFILE=DIR) writes profiles of the GUI thread, every
+    # video worker and the database calls into DIR on exit; other arguments go to Qt
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", metavar="DIR", help="profile this run into DIR")
+    args, qt_args = parser.parse_known_args()
+    if args.profile:
+        profiling.configure(args.profile)
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    app.aboutToQuit.connect(lambda: release_video_resources(close_model=True))
+    app.aboutToQuit.connect(database.pool.close_all)
     window = MainWindow()
     window.show()
-    sys.exit(app.exec_())
+    with profiling.profile_thread("gui"):
+        exit_code = app.exec_()
+    profiling.write_db_stats()
+    sys.exit(exit_code)
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+# Same skeleton as mp.solutions.hands.HAND_CONNECTIONS, kept here as an index array
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+], dtype=np.int32)
+
+
+# Draws the preview overlay (help text and hand skeletons) onto RGB frames.
+#
+# The help text never changes, so it is rendered once per frame size into a cached
+# patch and mask that are then just copied into place. Skeletons are drawn from
+# (N, 21, 3) landmark arrays with one polylines call for all bones and one for all
+# joints, instead of one cv2 call per landmark. Set enabled to False for headless runs.
+class OverlayRenderer:
+    def __init__(self, text, enabled=True, text_color=(0, 255, 0),
+                 landmark_color=(255, 0, 0), connection_color=(224, 224, 224)):
+        self.text = text
+        self.enabled = enabled
+        self.text_color = text_color
+        self.landmark_color = landmark_color
+        self.connection_color = connection_color
+        self._text_cache = {}
+
+    def draw(self, frame, hands, scale=1.0):
+        # hands are landmark arrays in normalized coordinates; scale sizes the text
+        # relative to how it looked on the full camera frame
+        if not self.enabled:
+            return
+        self._draw_text(frame, scale)
+        for hand in hands:
+            self._draw_hand(frame, hand)
+
+    def _draw_text(self, frame, scale):
+        key = (frame.shape, round(scale, 3))
+        cached = self._text_cache.get(key)
+        if cached is None:
+            cached = self._text_cache[key] = self._render_text(frame.shape, scale)
+        x0, y0, patch, mask = cached
+        if patch is not None:
+            h, w = mask.shape[:2]
+            np.copyto(frame[y0:y0 + h, x0:x0 + w], patch, where=mask)
+
+    def _render_text(self, shape, scale):
+        # Renders the text once on a blank canvas and keeps only its bounding box
+        canvas = np.zeros(shape[:2] + (3,), dtype=np.uint8)
+        cv2.putText(canvas, self.text, (int(10 * scale), int(30 * scale)), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.7 * scale, self.text_color, max(1, round(2 * scale)))
+        covered = canvas.any(axis=2)
+        if not covered.any():
+            return 0, 0, None, None
+        rows = np.flatnonzero(covered.any(axis=1))
+        cols = np.flatnonzero(covered.any(axis=0))
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        return x0, y0, canvas[y0:y1, x0:x1].copy(), covered[y0:y1, x0:x1, None].copy()
+
+    def _draw_hand(self, frame, hand):
+        h, w = frame.shape[:2]
+        points = np.rint(hand[:, :2] * (w, h)).astype(np.int32)
+
+        # All bones as one batch of two-point polylines
+        cv2.polylines(frame, points[HAND_CONNECTIONS], False, self.connection_color, 2)
+
+        # Joints as zero-length segments, which a thick line draws as filled dots:
+        # a white border first, then the landmark colour on top
+        joints = np.repeat(points[:, None, :], 2, axis=1)
+        cv2.polylines(frame, joints, False, (255, 255, 255), 7)
+        cv2.polylines(frame, joints, False, self.landmark_color, 5)
@@ -0,0 +1,112 @@
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+# Ring of preallocated RGB frames, each with a QImage that wraps the same memory.
+# The inference loop converts straight into one of these buffers and MediaPipe reads
+# it in place; preview frames are resized into buffers of their own and emitted as
+# the QImage that already wraps them. A few buffers are kept so the one being shown
+# by the GUI is not the one being overwritten by the next frame.
+class FrameBufferPool:
+    def __init__(self, count=3):
+        self.count = count
+        self.shape = None
+        self.buffers = []
+        self.images = []
+        self.index = 0
+
+    def next(self, shape):
+        if shape != self.shape:
+            self._allocate(shape)
+        self.index = (self.index + 1) % self.count
+        return self.buffers[self.index], self.images[self.index]
+
+    def _allocate(self, shape):
+        h, w = shape[:2]
+        self.shape = shape
+        self.buffers = [np.empty((h, w, 3), dtype=np.uint8) for _ in range(self.count)]
+        self.images = [QImage(buffer.data, w, h, 3 * w, QImage.Format_RGB888) for buffer in self.buffers]
+        self.index = 0
+
+
+# Rate-limited preview stream, produced on the worker thread at the size of the widget
+# that shows it (or at full size until one is set). The GUI calls set_target_size()
+# when the view is resized and set_visible() when the dialog is shown, hidden or
+# minimized; while nothing can be seen no preview frames are made at all.
+# Inference is not affected by any of this.
+class PreviewStream:
+    def __init__(self, max_fps=15.0, count=3):
+        self.max_fps = max_fps
+        self.visible = True
+        self.target_size = None
+        self.frames_emitted = 0
+        self.buffers = FrameBufferPool(count)
+        self._last_emit = None
+
+    def set_target_size(self, width, height):
+        self.target_size = (width, height) if width > 0 and height > 0 else None
+
+    def set_visible(self, visible):
+        self.visible = visible
+
+    def due(self, now):
+        if not self.visible:
+            return False
+        if self.max_fps and self._last_emit is not None and now - self._last_emit < 1.0 / self.max_fps:
+            return False
+        return True
+
+    def render(self, rgb_frame, now):
+        # Fits the frame inside the target size, keeping its aspect ratio
+        h, w = rgb_frame.shape[:2]
+        scale = 1.0
+        if self.target_size is not None:
+            target_w, target_h = self.target_size
+            scale = min(target_w / w, target_h / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+
+        preview_frame, preview_image = self.buffers.next((size[1], size[0], 3))
+        cv2.resize(rgb_frame, size, dst=preview_frame, interpolation=cv2.INTER_LINEAR)
+        self._last_emit = now
+        self.frames_emitted += 1
+        return preview_frame, preview_image
+
+
+# Hands preview frames from the worker to the GUI thread without letting them queue up.
+# The worker post()s every frame, but only one frame_ready notification is ever
+# waiting in the GUI event queue; when the GUI gets to it, take() returns the newest
+# frame and everything posted in between is dropped and counted in `coalesced`.
+class LatestFrameDelivery(QObject):
+    frame_ready = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._image = None
+        self._pending = False
+        self.delivered = 0
+        self.coalesced = 0
+
+    def post(self, image):
+        # Called from the worker thread
+        with self._lock:
+            if self._pending:
+                self.coalesced += 1
+            self._image = image
+            notify = not self._pending
+            self._pending = True
+        if notify:
+            self.frame_ready.emit()
+
+    def take(self):
+        # Called from the GUI thread; returns None if the frame was already taken
+        with self._lock:
+            image, self._image = self._image, None
+            self._pending = False
+            if image is not None:
+                self.delivered += 1
+        return image
@@ -0,0 +1,220 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Opt-in profiling for runs on student machines, where attaching a debugger is not an
+# option. Turned on with GESTURA_PROFILE=DIR (or main.py --profile DIR); nothing is
+# measured otherwise.
+#
+# python -m cProfile only follows the main thread, so VideoThread never showed up in
+# its profiles. Instead every thread that matters wraps its work in
+# profile_thread(name) and gets its own profile, written into DIR when it ends:
+#
+#   gui-<pid>.prof      the Qt event loop, i.e. the GUI thread
+#   video-<pid>.prof    the first gesture quiz's video worker, then video-<pid>-2.prof, ...
+#   db-<pid>.json       time spent in database calls, per statement
+#
+# GESTURA_PROFILE_MODE picks the profiler. "cprofile" (the default) records every
+# call, for python -m pstats or snakeviz. "sample" instead looks at the thread's
+# stack every few milliseconds from a background thread, which costs far less, and
+# writes collapsed stacks (<name>-<pid>.stacks) that flamegraph.pl or speedscope
+# read. Python 3.12 allows only one cProfile at a time, so later threads fall back to
+# sampling there.
+SAMPLE_INTERVAL = 0.005
+
+_directory = os.environ.get("GESTURA_PROFILE") or None
+_mode = os.environ.get("GESTURA_PROFILE_MODE", "cprofile")
+_lock = threading.Lock()
+_file_counts = Counter()
+_sampler = None
+# statement -> [calls, seconds]
+_db_calls = {}
+
+
+def configure(directory, mode=None):
+    global _directory, _mode
+    _directory = directory or None
+    if mode:
+        _mode = mode
+
+
+def enabled():
+    return _directory is not None
+
+
+def _output_path(name, extension):
+    # First file of a name is name-<pid>, later ones name-<pid>-2, -3, ...
+    with _lock:
+        _file_counts[name] += 1
+        count = _file_counts[name]
+    os.makedirs(_directory, exist_ok=True)
+    suffix = f"-{count}" if count > 1 else ""
+    return os.path.join(_directory, f"{name}-{os.getpid()}{suffix}.{extension}")
+
+
+# Profiles the calling thread for the duration of a with-block:
+#
+#     with profile_thread("video"):
+#         self.process_frames()
+@contextmanager
+def profile_thread(name):
+    if not enabled():
+        yield
+        return
+    profile = None
+    if _mode != "sample":
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another thread's cProfile is already running (Python 3.12+)
+            profile = None
+    if profile is None:
+        _start_sampler().watch()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(_output_path(name, "prof"))
+        else:
+            _sampler.unwatch(_output_path(name, "stacks"))
+
+
+def _start_sampler():
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = StackSampler(SAMPLE_INTERVAL)
+            _sampler.start()
+        return _sampler
+
+
+# Counts the stacks of the watched threads every interval seconds
+class StackSampler(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name="StackSampler", daemon=True)
+        self.interval = interval
+        # thread ident -> Counter of collapsed stacks
+        self.stacks = {}
+        self.lock = threading.Lock()
+
+    def watch(self):
+        with self.lock:
+            self.stacks[threading.get_ident()] = Counter()
+
+    def unwatch(self, path):
+        with self.lock:
+            stacks = self.stacks.pop(threading.get_ident())
+        with open(path, "w") as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                for ident, stacks in self.stacks.items():
+                    frame = frames.get(ident)
+                    calls = []
+                    while frame is not None:
+                        code = frame.f_code
+                        calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                        frame = frame.f_back
+                    if calls:
+                        stacks[";".join(reversed(calls))] += 1
+            del frames
+
+
+def _record_db_call(sql, seconds):
+    statement = " ".join(sql.split())[:200]
+    with _lock:
+        entry = _db_calls.get(statement)
+        if entry is None:
+            entry = _db_calls[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+
+# Cursor and connection that time every statement, fetch and commit. sqlite3 does
+# most of a query's work while rows are fetched, so fetches count towards the
+# statement that produced them.
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self._statement = sql
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record_db_call(sql, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._statement = sql
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_db_call(sql, time.perf_counter() - started)
+
+    def executescript(self, sql_script):
+        self._statement = sql_script
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            _record_db_call(sql_script, time.perf_counter() - started)
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            _record_db_call("fetch: " + getattr(self, "_statement", "?"), time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            _record_db_call("COMMIT", time.perf_counter() - started)
+
+
+def write_db_stats():
+    # Writes db-<pid>.json, slowest statements first; call once on exit
+    if not enabled():
+        return None
+    with _lock:
+        calls = sorted(_db_calls.items(), key=lambda item: -item[1][1])
+    path = _output_path("db", "json")
+    with open(path, "w") as f:
+        json.dump({"total_seconds": sum(seconds for _, (_, seconds) in calls),
+                   "statements": [{"sql": sql, "calls": count, "seconds": seconds}
+                                  for sql, (count, seconds) in calls]}, f, indent=2)
+    return path
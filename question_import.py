@@ -0,0 +1,302 @@
+import argparse
+import csv
+import html
+import io
+import json
+import os
+import re
+import sys
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+from itertools import chain, islice
+
+# Imports question banks with thousands of questions as a new quiz, from
+#
+#   CSV         a header row naming the columns: question, option_a ... option_d
+#               (or a ... d, option1 ... option4) and answer, the correct option as
+#               A-D, 1-4 or its text
+#   JSON        an array of {"question": ..., "options": [...], "answer": ...}, or the
+#               same objects one per line (JSON Lines)
+#   Moodle XML  multiple-choice and true/false questions; the answer with fraction
+#               100 is the correct one
+#
+# Files are parsed incrementally, so memory use does not grow with the bank, and
+# questions are written with executemany in batches inside a single transaction: a
+# bank is imported completely or not at all. Questions the quiz cannot show (not 2-4
+# options, no single correct answer) are skipped and reported.
+#
+# Teachers import from the Quiz tab ("Import Questions"), or from the command line:
+#
+#     python question_import.py bank.xml --teacher 3 --title "Biology 101"
+BATCH_SIZE = 5000
+MIN_OPTIONS = 2
+MAX_OPTIONS = 4
+# How many skipped questions are described in the result; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+OPTION_LETTERS = "ABCD"
+
+ImportResult = namedtuple("ImportResult", ["quiz_id", "imported", "skipped", "errors", "seconds"])
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+# A parsed question: (question_text, options, correct_answer index). Parsers yield one
+# per question, or a string describing why that question could not be used.
+def make_question(text, options, answer, where):
+    text = (text or "").strip()
+    options = [(option or "").strip() for option in options]
+    # Unused trailing columns are fine, a gap between options is not: it would shift
+    # the letters the answer refers to
+    while options and not options[-1]:
+        options.pop()
+    if not text:
+        return f"{where}: no question text"
+    if not all(options):
+        return f"{where}: empty option between others"
+    if not MIN_OPTIONS <= len(options) <= MAX_OPTIONS:
+        return f"{where}: {len(options)} options, the quiz shows {MIN_OPTIONS}-{MAX_OPTIONS}"
+    correct = answer_index(answer, options)
+    if correct is None:
+        return f"{where}: answer {answer!r} is not one of the options"
+    return text, options, correct
+
+
+def answer_index(answer, options):
+    # A-D, 1-4 (or an int), or the text of the correct option
+    if isinstance(answer, int) and not isinstance(answer, bool):
+        return answer - 1 if 1 <= answer <= len(options) else None
+    answer = str(answer if answer is not None else "").strip()
+    if len(answer) == 1 and answer.upper() in OPTION_LETTERS[:len(options)]:
+        return OPTION_LETTERS.index(answer.upper())
+    if answer.isdigit() and 1 <= int(answer) <= len(options):
+        return int(answer) - 1
+    return options.index(answer) if answer in options else None
+
+
+_CSV_COLUMNS = {
+    "question": ("question", "question_text", "text"),
+    "answer": ("answer", "correct", "correct_answer"),
+}
+_CSV_OPTION_COLUMNS = (("option_a", "a", "option1", "option_1"), ("option_b", "b", "option2", "option_2"),
+                       ("option_c", "c", "option3", "option_3"), ("option_d", "d", "option4", "option_4"))
+
+
+def parse_csv(f):
+    reader = csv.reader(f)
+    header = [name.strip().lower() for name in next(reader, [])]
+
+    def column(names):
+        return next((header.index(name) for name in names if name in header), None)
+
+    question_column = column(_CSV_COLUMNS["question"])
+    answer_column = column(_CSV_COLUMNS["answer"])
+    option_columns = [index for index in map(column, _CSV_OPTION_COLUMNS) if index is not None]
+    if question_column is None or answer_column is None or not option_columns:
+        raise ValueError("CSV header needs question, option_a ... option_d and answer columns")
+    for row in reader:
+        if not any(row):
+            continue
+        cells = row + [""] * (len(header) - len(row))
+        yield make_question(cells[question_column], [cells[index] for index in option_columns],
+                            cells[answer_column], f"line {reader.line_num}")
+
+
+def parse_json(f):
+    # Reads the objects of a top-level array one at a time with raw_decode, so the
+    # whole file is never in memory; anything else is taken as JSON Lines
+    decoder = json.JSONDecoder()
+    buffer = f.read(65536)
+    position = _SEPARATORS.match(buffer).end()
+    if not buffer.startswith("[", position):
+        for number, line in enumerate(_lines(buffer, f), 1):
+            if line.strip():
+                yield _json_question(json.loads(line), f"line {number}")
+        return
+    position += 1
+    number = 0
+    while True:
+        position = _SEPARATORS.match(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # Most likely the object runs on into the next chunk
+            more = f.read(65536)
+            if not more:
+                raise ValueError(f"JSON array is malformed or cut short after question {number}")
+            buffer = buffer[position:] + more
+            position = 0
+            continue
+        number += 1
+        yield _json_question(item, f"question {number}")
+
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+def _lines(first_chunk, f):
+    # The lines of a file whose first chunk was already read
+    rest = ""
+    for chunk in chain((first_chunk,), iter(lambda: f.read(65536), "")):
+        rest += chunk
+        *lines, rest = rest.split("\n")
+        yield from lines
+    if rest:
+        yield rest
+
+
+def _json_question(item, where):
+    if not isinstance(item, dict):
+        return f"{where}: not an object"
+    return make_question(item.get("question") or item.get("question_text"), item.get("options") or [],
+                         item.get("answer", item.get("correct_answer")), where)
+
+
+_TAGS = re.compile(r"<[^>]+>")
+
+
+def _plain_text(element):
+    # Moodle stores question and answer texts as (escaped) HTML
+    if element is None:
+        return ""
+    text = element.findtext("text") or ""
+    return html.unescape(_TAGS.sub(" ", text)).strip()
+
+
+def parse_moodle_xml(f):
+    # iterparse hands over each <question> once it is complete; the tree is cleared
+    # right after, so it never holds more than one question
+    number = 0
+    root = None
+    for event, element in ElementTree.iterparse(f, events=("start", "end")):
+        if root is None:
+            root = element
+        if event != "end" or element.tag != "question":
+            continue
+        kind = element.get("type")
+        if kind in ("multichoice", "truefalse"):
+            number += 1
+            name = element.findtext("name/text") or f"question {number}"
+            options, correct = [], []
+            for answer in element.findall("answer"):
+                options.append(_plain_text(answer))
+                if float(answer.get("fraction", "0")) >= 100:
+                    correct.append(options[-1])
+            if len(correct) != 1:
+                yield f"{name}: {len(correct)} fully correct answers, the quiz needs exactly one"
+            else:
+                yield make_question(_plain_text(element.find("questiontext")), options, correct[0], name)
+        elif kind not in ("category", None):
+            number += 1
+            yield f"question {number}: {kind} questions are not supported"
+        root.clear()
+
+
+PARSERS = {".csv": parse_csv, ".json": parse_json, ".jsonl": parse_json, ".xml": parse_moodle_xml}
+
+
+def parser_for(path):
+    parser = PARSERS.get(os.path.splitext(path)[1].lower())
+    if parser is None:
+        raise ValueError(f"Unsupported file type: {path} (use {', '.join(sorted(PARSERS))})")
+    return parser
+
+
+# Parses a question bank already opened in binary mode; path only picks the format
+def parse_question_bank(f, path):
+    parser = parser_for(path)
+    # ElementTree does its own decoding; the text formats are read as UTF-8, with or without BOM
+    if parser is parse_moodle_xml:
+        return parser(f)
+    return parser(io.TextIOWrapper(f, encoding="utf-8-sig", newline=""))
+
+
+# Creates a quiz for teacher_id from a question bank. progress(imported, skipped, done)
+# is called after every batch, done being the fraction of the file read so far, and
+# cancelled() is checked there too; returning True rolls the whole import back and
+# raises ImportCancelled.
+def import_question_bank(connection, path, teacher_id, title=None, progress=None, cancelled=None,
+                         batch_size=BATCH_SIZE):
+    # Unsupported files fail here, before anything is written
+    parser_for(path)
+    title = title or os.path.splitext(os.path.basename(path))[0]
+    size = max(os.path.getsize(path), 1)
+    started = time.perf_counter()
+    skipped = 0
+    errors = []
+
+    def rows(f, quiz_id):
+        nonlocal skipped
+        for question in parse_question_bank(f, path):
+            if isinstance(question, str):
+                skipped += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append(question)
+                continue
+            text, options, correct = question
+            yield quiz_id, text, json.dumps(options), correct
+
+    with open(path, "rb") as f:
+        connection.execute("BEGIN")
+        try:
+            cursor = connection.execute("INSERT INTO quizzes (teacher_id, title) VALUES (?, ?)", (teacher_id, title))
+            quiz_id = cursor.lastrowid
+            imported = 0
+            pending = rows(f, quiz_id)
+            while True:
+                batch = list(islice(pending, batch_size))
+                if not batch:
+                    break
+                connection.executemany(
+                    "INSERT INTO questions (quiz_id, question_text, options, correct_answer) VALUES (?, ?, ?, ?)",
+                    batch)
+                imported += len(batch)
+                if progress is not None:
+                    progress(imported, skipped, min(f.tell() / size, 1.0))
+                if cancelled is not None and cancelled():
+                    raise ImportCancelled()
+            if imported == 0:
+                raise ValueError(f"No usable questions in {path}" + (f" ({errors[0]})" if errors else ""))
+            connection.commit()
+        except BaseException:
+            connection.rollback()
+            raise
+    return ImportResult(quiz_id, imported, skipped, errors, time.perf_counter() - started)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Import a question bank as a new quiz")
+    parser.add_argument("path", help="CSV, JSON / JSON Lines or Moodle XML file")
+    parser.add_argument("--teacher", type=int, required=True, help="id of the teacher who owns the quiz")
+    parser.add_argument("--title", help="quiz title; the file name by default")
+    parser.add_argument("--database", help="database file; GESTURA_DATABASE or gestura.db by default")
+    args = parser.parse_args(argv)
+
+    import database
+    pool = database.ConnectionPool(args.database) if args.database else database.pool
+    connection = pool.connection()
+    database.migrate(connection)
+
+    def progress(imported, skipped, done):
+        print(f"\r{done:4.0%} {imported} questions imported, {skipped} skipped", end="", flush=True)
+
+    try:
+        result = import_question_bank(connection, args.path, args.teacher, args.title, progress)
+    except (OSError, ValueError, ElementTree.ParseError, json.JSONDecodeError) as e:
+        print(f"\nImport failed, nothing was saved: {e}")
+        return 1
+    finally:
+        pool.close_all()
+    print(f"\nquiz {result.quiz_id}: {result.imported} questions in {result.seconds:.2f}s "
+          f"({result.imported / max(result.seconds, 1e-9):,.0f} questions/s), {result.skipped} skipped")
+    for error in result.errors:
+        print("  skipped", error)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
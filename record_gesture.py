@@ -0,0 +1,106 @@
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import mediapipe as mp
+
+from dtw_gestures import (
+    NAVIGATION_ACTIONS, TEMPLATE_SECONDS, GestureTemplate, dtw_distance, trajectory_features
+)
+from frame_sources import open_frame_source
+from landmarks import landmarks_to_array
+
+# Records a new dynamic navigation gesture into the template library, so teachers can
+# add gestures by showing them to the camera instead of writing code:
+#
+#     python record_gesture.py circle submit
+#     python record_gesture.py wave next --repetitions 5 --source clips/wave.mp4
+#
+# The gesture is performed a few times, TEMPLATE_SECONDS each after a short
+# countdown. The repetition closest to all the others becomes the template, and the
+# spread between repetitions widens its match threshold where needed.
+DEFAULT_DIRECTORY = "gesture_templates"
+COUNTDOWN_SECONDS = 2.0
+# How much further than the furthest repetition a live movement may be and still match
+SPREAD_MARGIN = 1.25
+
+
+def record_repetition(source, hands, index):
+    print(f"Repetition {index}: get ready...")
+    deadline = time.monotonic() + COUNTDOWN_SECONDS
+    while time.monotonic() < deadline:
+        source.read()
+    print("Go!")
+
+    times, points = [], []
+    started = time.monotonic()
+    while time.monotonic() - started < TEMPLATE_SECONDS:
+        ret, frame = source.read()
+        if not ret:
+            break
+        rgb_frame = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+        results = hands.process(rgb_frame)
+        if results.multi_hand_landmarks:
+            times.append(time.monotonic())
+            points.append(landmarks_to_array(results.multi_hand_landmarks[0]))
+
+    if len(points) < 2 or times[-1] - times[0] < TEMPLATE_SECONDS / 2:
+        print("No hand seen for long enough, skipping this repetition")
+        return None
+    # Resampled over the whole recording window, like the live queries, so a template
+    # and a query of the same movement run at the same speed
+    return trajectory_features(times, points, start=started, end=started + TEMPLATE_SECONDS)
+
+
+def build_template(name, action, repetitions):
+    # The medoid repetition is the template; with several repetitions the threshold
+    # also has to cover the furthest of the others
+    if len(repetitions) == 1:
+        return GestureTemplate(name, action, repetitions[0])
+    distances = [[dtw_distance(a, b) for b in repetitions] for a in repetitions]
+    medoid = min(range(len(repetitions)), key=lambda i: sum(distances[i]))
+    template = GestureTemplate(name, action, repetitions[medoid])
+    template.threshold = max(template.threshold, SPREAD_MARGIN * max(distances[medoid]))
+    return template
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Record a dynamic gesture template")
+    parser.add_argument("name", help="name of the gesture, also its file name")
+    parser.add_argument("action", choices=NAVIGATION_ACTIONS, help="what the quiz does when it is seen")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--source", default=os.environ.get("GESTURA_SOURCE", "0"),
+                        help="camera index, video file or image directory")
+    parser.add_argument("--directory", default=os.environ.get("GESTURA_GESTURE_TEMPLATES", DEFAULT_DIRECTORY))
+    args = parser.parse_args(argv)
+
+    source = open_frame_source(args.source)
+    if not source.isOpened():
+        print(f"Cannot open {args.source}")
+        return 1
+    repetitions = []
+    try:
+        with mp.solutions.hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.5) as hands:
+            for index in range(1, args.repetitions + 1):
+                trajectory = record_repetition(source, hands, index)
+                if trajectory is not None:
+                    repetitions.append(trajectory)
+    finally:
+        source.release()
+
+    if not repetitions:
+        print("Nothing recorded")
+        return 1
+    template = build_template(args.name, args.action, repetitions)
+    os.makedirs(args.directory, exist_ok=True)
+    path = os.path.join(args.directory, args.name + ".npz")
+    template.save(path)
+    print(f"Saved {args.name} ({args.action}) from {len(repetitions)} repetitions to {path}, "
+          f"threshold {template.threshold:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,229 @@
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+# Append-only binary recording of the landmarks VideoThread saw, so misfires reported
+# by students can be replayed through the gesture classifiers without a camera or
+# MediaPipe.
+#
+# A file is a 64 byte header followed by fixed-size records, one per hand per frame
+# and one (with hand_count 0) for every frame without hands. Because every record has
+# the same size the whole file can be opened with numpy.memmap. Coordinates are
+# stored as int16 in 1/8192ths of the frame, about 0.1 px at 640 px wide. A record
+# is 142 bytes, so an hour at 30 fps with a hand in view takes ~15 MB, and a typical
+# class hour (hands in view a fifth of the time, 5 fps idle otherwise) ~5 MB.
+MAGIC = b"GSTLMK\r\n"
+VERSION = 1
+HEADER = struct.Struct("<8sIIfd")
+HEADER_SIZE = 64
+COORDINATE_SCALE = 8192.0
+
+RECORD_DTYPE = np.dtype([
+    ("frame_id", "<u4"),
+    ("timestamp", "<f8"),     # capture time, seconds (time.monotonic)
+    ("hand", "u1"),           # this hand's position within its frame
+    ("hand_count", "u1"),     # hands in the frame; 0 marks a frame without hands
+    ("handedness", "i1"),     # +1 right, -1 left, 0 unknown
+    ("score", "u1"),          # handedness score, 0-255
+    ("landmarks", "<i2", (NUM_LANDMARKS, 3)),
+])
+
+_HANDEDNESS_CODES = {"Right": 1, "Left": -1}
+_HANDEDNESS_LABELS = {1: "Right", -1: "Left", 0: None}
+
+
+class LandmarkRecorder:
+    def __init__(self, path, max_hands=2):
+        self.path = path
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not new_file:
+            read_header(path)
+            # Drop a record cut short by a crash, so new ones stay aligned
+            size = os.path.getsize(path)
+            whole = HEADER_SIZE + (size - HEADER_SIZE) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+            if whole != size:
+                os.truncate(path, whole)
+        self.file = open(path, "ab")
+        if new_file:
+            header = HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, COORDINATE_SCALE, time.time())
+            self.file.write(header.ljust(HEADER_SIZE, b"\0"))
+        # Reused for every frame; only the filled rows are written
+        self.records = np.zeros(max(1, max_hands), dtype=RECORD_DTYPE)
+        self.frames_written = 0
+
+    def write_frame(self, frame_id, timestamp, hands, handedness=None, scores=None):
+        # hands: (N, 21, 3) normalized landmarks of one frame, N may be 0
+        count = min(len(hands), len(self.records))
+        rows = self.records[:max(1, count)]
+        rows["frame_id"] = frame_id
+        rows["timestamp"] = timestamp
+        rows["hand_count"] = count
+        if count == 0:
+            rows["hand"] = 0
+            rows["handedness"] = 0
+            rows["score"] = 0
+            rows["landmarks"] = 0
+        else:
+            rows["hand"] = np.arange(count)
+            rows["handedness"] = [_HANDEDNESS_CODES.get(label, 0)
+                                  for label in (handedness or [None] * count)[:count]]
+            rows["score"] = [round(score * 255) for score in (scores or [0.0] * count)[:count]]
+            np.clip(np.rint(hands[:count] * COORDINATE_SCALE), -32768, 32767, out=rows["landmarks"],
+                    casting="unsafe")
+        self.file.write(rows.tobytes())
+        self.frames_written += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path} is not a landmark recording")
+    magic, version, record_size, scale, started = HEADER.unpack_from(raw)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a version {VERSION} landmark recording")
+    return {"version": version, "scale": scale, "started": started}
+
+
+def open_recording(path):
+    # The records as a read-only memmap; a record cut short by a crash is left out
+    header = read_header(path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE), header
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,)), header
+
+
+# Plays a recording back frame by frame as (frame_id, timestamp, points, handedness),
+# where points is a (N, 21, 3) float32 array and handedness a list of labels, the same
+# shapes VideoThread works with after inference. All landmarks are converted in one
+# vectorized step up front, so iterating costs little more than slicing.
+def replay_frames(records):
+    if len(records) == 0:
+        return
+    points = records["landmarks"].astype(np.float32) / COORDINATE_SCALE
+    labels = [_HANDEDNESS_LABELS[code] for code in records["handedness"].tolist()]
+    hand_counts = records["hand_count"]
+    frame_ids = records["frame_id"]
+    timestamps = records["timestamp"]
+    starts = [0] + (np.flatnonzero(frame_ids[1:] != frame_ids[:-1]) + 1).tolist() + [len(records)]
+    for start, end in zip(starts, starts[1:]):
+        count = int(hand_counts[start])
+        end = start + count if count else start
+        yield int(frame_ids[start]), float(timestamps[start]), points[start:end], labels[start:end]
+
+
+# Runs a recording through a classifier and a debouncer the way VideoThread does and
+# returns the debounced events with the frame they happened on. classify takes
+# (points, handedness) for one hand and returns a gesture id or None.
+def replay_gestures(records, classify, debouncer):
+    events = []
+    for frame_id, timestamp, points, handedness in replay_frames(records):
+        gesture = None
+        for hand, label in zip(points, handedness):
+            gesture = classify(hand, label)
+            if gesture is not None:
+                break
+        event = debouncer.update(gesture, timestamp)
+        if event is not None:
+            events.append((frame_id, event))
+    return events
+
+
+# Labels for a recording, so it can be used as training data (gesture_model.py): a
+# JSON list of [seconds, label] pairs in time order, seconds counted from the first
+# frame of the recording, label "A"-"D" for an option, null for a hand that shows no
+# gesture, or "skip" for a stretch to leave out. Each label holds until the next one:
+#
+#     [[0, "skip"], [4.5, "A"], [9, null], [12, "B"], [16.5, "skip"]]
+#
+# A schedule is easiest to write while watching the session's preview video, or by
+# having the student follow a script of poses held for a few seconds each.
+LABEL_OPTIONS = "ABCD"
+# Seconds after every label change that are left out, while the hand is still moving
+# from one pose to the next
+LABEL_MARGIN = 0.4
+SKIP_LABEL = "skip"
+
+
+def load_labels(path):
+    with open(path) as f:
+        entries = json.load(f)
+    labels = []
+    for seconds, label in entries:
+        if label is None:
+            labels.append((float(seconds), None))
+        elif str(label).lower() == SKIP_LABEL:
+            labels.append((float(seconds), SKIP_LABEL))
+        elif str(label).upper() in LABEL_OPTIONS and len(str(label)) == 1:
+            labels.append((float(seconds), LABEL_OPTIONS.index(str(label).upper())))
+        else:
+            raise ValueError(f"{path}: unknown label {label!r} at {seconds}s")
+    if [seconds for seconds, _ in labels] != sorted(seconds for seconds, _ in labels):
+        raise ValueError(f"{path}: labels are not in time order")
+    return labels
+
+
+# The hands of a recording with the label that was on at their frame: returns (points
+# (N, 21, 3), gestures (N,) with -1 for no gesture, handedness list). Only frames with
+# exactly one hand are used, since a label says nothing about which of two hands made
+# the gesture; frames before the first label, in "skip" stretches or within margin
+# seconds of a label change are left out.
+def labelled_hands(records, labels, margin=LABEL_MARGIN):
+    empty = (np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32), np.zeros(0, dtype=np.int64), [])
+    if len(records) == 0 or not labels:
+        return empty
+    single = records[(records["hand_count"] == 1)]
+    if len(single) == 0:
+        return empty
+    seconds = single["timestamp"] - records["timestamp"][0]
+    starts = np.array([start for start, _ in labels])
+    current = np.searchsorted(starts, seconds, side="right") - 1
+    since_change = seconds - starts[np.maximum(current, 0)]
+    codes = np.array([-2 if label == SKIP_LABEL else (-1 if label is None else label) for _, label in labels])
+    gestures = codes[np.maximum(current, 0)]
+    keep = (current >= 0) & (gestures != -2) & (since_change >= margin)
+    single = single[keep]
+    points = single["landmarks"].astype(np.float32) / COORDINATE_SCALE
+    handedness = [_HANDEDNESS_LABELS[code] or "Right" for code in single["handedness"].tolist()]
+    return points, gestures[keep].astype(np.int64), handedness
+
+
+def main(argv):
+    # python recording.py RECORDING.gstl [MODEL.npz]
+    if not argv:
+        print("usage: recording.py RECORDING.gstl [MODEL.npz]")
+        return 2
+    from debounce import GestureDebouncer, COMMITTED
+    from landmarks import finger_count_gesture
+    records, header = open_recording(argv[0])
+    classify = finger_count_gesture
+    if len(argv) > 1:
+        from gesture_model import GestureModel
+        classify = GestureModel.load(argv[1]).classify
+
+    started = time.perf_counter()
+    events = replay_gestures(records, classify, GestureDebouncer())
+    elapsed = time.perf_counter() - started
+
+    for frame_id, event in events:
+        if event.kind == COMMITTED:
+            print(f"frame {frame_id:7d}  t={event.timestamp:9.3f}s  option {'ABCD'[event.gesture]}")
+    frames = len(set(records["frame_id"].tolist())) if len(records) else 0
+    duration = float(records["timestamp"][-1] - records["timestamp"][0]) if len(records) else 0.0
+    speedup = duration / elapsed if elapsed > 0 else float("inf")
+    print(f"{frames} frames, {duration:.1f}s recorded, replayed in {elapsed:.3f}s ({speedup:.0f}x real time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,104 @@
+import math
+
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+ONE_EURO = "one_euro"
+EMA = "ema"
+
+
+# Smooths hand landmarks over time before they are classified, so tip-versus-joint
+# comparisons near their threshold stop flickering from frame to frame.
+#
+# ONE_EURO is the One-Euro filter (Casiez et al., CHI 2012): a low-pass filter whose
+# cutoff rises with the landmark's speed, so a still hand is smoothed heavily while a
+# moving one is followed with little lag. EMA is a plain exponential moving average
+# with a fixed time constant. Both work from the capture timestamps, so they behave
+# the same whatever the frame rate.
+#
+# Every hand slot keeps its state in preallocated (21, 3) arrays and the filter runs
+# vectorized over all 63 coordinates at once, without allocating per frame. A slot
+# starts over when its hand disappears or after a gap of more than max_gap seconds.
+class LandmarkSmoother:
+    def __init__(self, max_hands=2, method=ONE_EURO, min_cutoff=1.0, beta=20.0, d_cutoff=1.0,
+                 time_constant=0.05, max_gap=0.5):
+        if method not in (ONE_EURO, EMA):
+            raise ValueError(f"Unknown smoothing method: {method}")
+        self.method = method
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.time_constant = time_constant
+        self.max_gap = max_gap
+
+        shape = (max_hands, NUM_LANDMARKS, 3)
+        self.values = np.zeros(shape, dtype=np.float32)
+        self.derivatives = np.zeros(shape, dtype=np.float32)
+        self.last_time = [None] * max_hands
+        self.labels = [None] * max_hands
+        self.output = np.zeros(shape, dtype=np.float32)
+        self._delta = np.zeros(shape[1:], dtype=np.float32)
+        self._alpha = np.zeros(shape[1:], dtype=np.float32)
+        self._scratch = np.zeros(shape[1:], dtype=np.float32)
+
+    def reset(self):
+        self.last_time = [None] * len(self.last_time)
+        self.labels = [None] * len(self.labels)
+
+    def smooth(self, hands, timestamp, handedness=None):
+        # hands: (N, 21, 3) landmarks of this frame; returns the smoothed (N, 21, 3),
+        # a view that stays valid until the next call
+        count = min(len(hands), len(self.values))
+        for slot in range(count):
+            label = handedness[slot] if handedness is not None and slot < len(handedness) else None
+            # MediaPipe does not promise to list the hands in the same order every frame
+            if label != self.labels[slot]:
+                self.last_time[slot] = None
+                self.labels[slot] = label
+            self._smooth_slot(slot, hands[slot], timestamp)
+        for slot in range(count, len(self.values)):
+            self.last_time[slot] = None
+        return self.output[:count]
+
+    def _smooth_slot(self, slot, points, timestamp):
+        value = self.values[slot]
+        output = self.output[slot]
+        last_time = self.last_time[slot]
+        self.last_time[slot] = timestamp
+        elapsed = None if last_time is None else timestamp - last_time
+        if elapsed is None or elapsed > self.max_gap or elapsed <= 0:
+            value[:] = points
+            self.derivatives[slot].fill(0.0)
+            output[:] = points
+            return
+
+        delta = self._delta
+        np.subtract(points, value, out=delta)
+        if self.method == EMA:
+            delta *= 1.0 - math.exp(-elapsed / self.time_constant)
+            value += delta
+        else:
+            # Smoothed speed of every coordinate decides how much it is smoothed
+            derivative = self.derivatives[slot]
+            scratch = self._scratch
+            factor = self._smoothing_factor(self.d_cutoff, elapsed)
+            np.multiply(delta, factor / elapsed, out=scratch)
+            derivative *= 1.0 - factor
+            derivative += scratch
+            # alpha = r / (r + 1) with r = 2 pi cutoff elapsed, cutoff = min_cutoff + beta |speed|
+            alpha = self._alpha
+            np.abs(derivative, out=alpha)
+            alpha *= self.beta
+            alpha += self.min_cutoff
+            alpha *= 2.0 * math.pi * elapsed
+            np.add(alpha, 1.0, out=scratch)
+            np.divide(alpha, scratch, out=alpha)
+            delta *= alpha
+            value += delta
+        output[:] = value
+
+    @staticmethod
+    def _smoothing_factor(cutoff, elapsed):
+        rate = 2.0 * math.pi * cutoff * elapsed
+        return rate / (rate + 1.0)
@@ -0,0 +1,132 @@
+import json
+import math
+import time
+
+# Per-stage timing of the video pipeline, so a lab that reports slowness can send the
+# numbers instead of a description.
+#
+# Every stage gets a fixed-size histogram of log-spaced buckets (1 us to 10 s, 20 per
+# decade, so each bucket is ~12% wide), which costs the same whether a session lasts a
+# minute or a day. Only the worker thread writes to them and the counts are plain
+# integers that are only ever incremented, so the GUI thread can read a summary at
+# any time without a lock; at worst it misses the frame being recorded right then.
+LOWEST_SECONDS = 1e-6
+HIGHEST_SECONDS = 10.0
+BUCKETS_PER_DECADE = 20
+
+
+class LatencyHistogram:
+    def __init__(self, low=LOWEST_SECONDS, high=HIGHEST_SECONDS, per_decade=BUCKETS_PER_DECADE):
+        self.log_low = math.log10(low)
+        self.per_decade = per_decade
+        self.buckets = int(math.ceil((math.log10(high) - self.log_low) * per_decade))
+        # First and last count everything below low and above high
+        self.counts = [0] * (self.buckets + 2)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        if seconds > 0:
+            index = int((math.log10(seconds) - self.log_low) * self.per_decade) + 1
+            index = min(max(index, 0), self.buckets + 1)
+        else:
+            index = 0
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def bucket_middle(self, index):
+        # Geometric middle of a bucket, in seconds
+        return 10.0 ** (self.log_low + (index - 0.5) / self.per_decade)
+
+    def percentile(self, percent):
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return None
+        rank = percent / 100.0 * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if count and seen >= rank:
+                return min(self.bucket_middle(index), self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 95, 99)):
+        summary = {"count": self.count,
+                   "mean_ms": self.total / self.count * 1e3 if self.count else None,
+                   "max_ms": self.max * 1e3 if self.count else None}
+        for percent in percentiles:
+            value = self.percentile(percent)
+            summary[f"p{percent}_ms"] = value * 1e3 if value is not None else None
+        return summary
+
+
+# Times the stages of one frame after another with time.perf_counter, which is
+# monotonic and fine-grained on every platform:
+#
+#     timings.start()
+#     ...; timings.lap("color")
+#     ...; timings.lap("inference")
+#     timings.finish()
+#
+# lap() charges the time since the previous lap to a stage. A stage may be lapped
+# more than once in a frame and its laps are added up; stages a frame skipped are
+# not recorded for it. finish() also records the whole frame as "frame".
+class StageTimings:
+    def __init__(self, stages):
+        self.stages = tuple(stages)
+        self.index = {stage: i for i, stage in enumerate(self.stages)}
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages + ("frame",)}
+        self.started = time.monotonic()
+        self._pending = [0.0] * len(self.stages)
+        self._touched = [False] * len(self.stages)
+        self._frame_start = 0.0
+        self._last = 0.0
+
+    def start(self):
+        self._frame_start = self._last = time.perf_counter()
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        i = self.index[stage]
+        self._pending[i] += now - self._last
+        self._touched[i] = True
+        self._last = now
+
+    def record(self, stage, seconds):
+        # A stage timed elsewhere, e.g. by the capture thread
+        self.histograms[stage].add(seconds)
+
+    def finish(self):
+        for i, stage in enumerate(self.stages):
+            if self._touched[i]:
+                self.histograms[stage].add(self._pending[i])
+                self._pending[i] = 0.0
+                self._touched[i] = False
+        self.histograms["frame"].add(self._last - self._frame_start)
+
+    def summary(self):
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def overlay_text(self):
+        # One line per stage that has been seen: last, p50 and p95 in milliseconds
+        lines = [f"{'stage':10} {'last':>6} {'p50':>6} {'p95':>6} ms"]
+        for stage, histogram in self.histograms.items():
+            if histogram.count:
+                p50, p95 = histogram.percentile(50), histogram.percentile(95)
+                lines.append(f"{stage:10} {histogram.last * 1e3:6.1f} {p50 * 1e3:6.1f} {p95 * 1e3:6.1f}")
+        return "\n".join(lines)
+
+    def save(self, path, **extra):
+        report = {"created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                  "seconds": time.monotonic() - self.started,
+                  "stages": self.summary()}
+        report.update(extra)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,83 @@
+import numpy as np
+
+SWIPE_LEFT = "left"
+SWIPE_RIGHT = "right"
+
+
+# Recognises horizontal swipes from timestamped wrist positions.
+#
+# Samples go into a fixed-size ring buffer of (timestamp, x, y). On every update the
+# wrist's displacement is measured over the last `window` seconds, interpolating the
+# position at exactly `window` seconds ago, so the decision is the same whether the
+# camera delivers 10 or 60 frames a second. A swipe needs at least `min_distance`
+# (in normalized image widths) of mostly horizontal travel within the window; once
+# one is reported the history is cleared and nothing fires for another `window`
+# seconds, so the tail of the same movement is not taken for a second swipe.
+# A gap longer than `max_gap` seconds (the hand left the view) also starts over.
+#
+# Each update is O(1) amortized: the oldest-sample index only ever moves forward.
+class SwipeDetector:
+    def __init__(self, window=0.3, min_distance=0.15, max_gap=0.25, capacity=128):
+        self.window = window
+        self.min_distance = min_distance
+        self.max_gap = max_gap
+        self.capacity = capacity
+        self.quiet_until = None
+        self.times = np.zeros(capacity)
+        self.positions = np.zeros((capacity, 2))
+        self.reset()
+
+    def reset(self):
+        # head is where the next sample goes, tail the oldest sample still needed
+        self.head = 0
+        self.tail = 0
+        self.size = 0
+        self.velocity = 0.0
+
+    def update(self, timestamp, x, y):
+        # Adds one wrist sample; returns SWIPE_LEFT, SWIPE_RIGHT or None
+        if self.size and timestamp - self.times[(self.head - 1) % self.capacity] > self.max_gap:
+            self.reset()
+        # Right after a swipe only the newest sample is kept, so the rest of the same
+        # movement never adds up to a second one
+        if self.quiet_until is not None and timestamp < self.quiet_until:
+            self.reset()
+
+        self.times[self.head] = timestamp
+        self.positions[self.head] = (x, y)
+        self.head = (self.head + 1) % self.capacity
+        if self.size == self.capacity:
+            self.tail = (self.tail + 1) % self.capacity
+        else:
+            self.size += 1
+
+        # Keep exactly one sample at or before the start of the window to interpolate from
+        start = timestamp - self.window
+        while self.size > 2 and self.times[(self.tail + 1) % self.capacity] <= start:
+            self.tail = (self.tail + 1) % self.capacity
+            self.size -= 1
+        if self.size < 2:
+            return None
+
+        dx, dy, elapsed = self._displacement(start, timestamp, x, y)
+        self.velocity = dx / elapsed if elapsed > 0 else 0.0
+        if abs(dx) < self.min_distance or abs(dx) < 2 * abs(dy):
+            return None
+        self.reset()
+        self.quiet_until = timestamp + self.window
+        return SWIPE_RIGHT if dx > 0 else SWIPE_LEFT
+
+    def _displacement(self, start, timestamp, x, y):
+        # Movement from the interpolated position at `start` (or the oldest sample, if
+        # the history is shorter than the window) to the newest sample
+        t0 = self.times[self.tail]
+        x0, y0 = self.positions[self.tail]
+        if t0 < start:
+            following = (self.tail + 1) % self.capacity
+            t1 = self.times[following]
+            x1, y1 = self.positions[following]
+            share = (start - t0) / (t1 - t0)
+            x0 += share * (x1 - x0)
+            y0 += share * (y1 - y0)
+            t0 = start
+        return x - x0, y - y0, timestamp - t0
@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+
+from landmarks import NUM_LANDMARKS
+
+# Procedurally posed hands in MediaPipe's landmark layout, for training and
+# benchmarking gesture classifiers without a camera. A hand is built upright in
+# its own frame (wrist at the origin, fingers pointing towards -y, one palm width
+# ~ 1), each digit either straight or curled into the palm, and is then tilted,
+# scaled, moved and mirrored into normalized image coordinates.
+
+# Thumb, index, middle, ring, pinky: the base joint (CMC / MCP) of each digit
+DIGIT_BASES = np.array([1, 5, 9, 13, 17])
+_BASE_POSITIONS = np.array([[-0.45, -0.35], [-0.35, -1.0], [-0.1, -1.05], [0.15, -1.0], [0.38, -0.9]])
+_DIRECTIONS = np.radians([-55.0, -8.0, 0.0, 7.0, 15.0])
+_SEGMENTS = np.array([[0.45, 0.35, 0.3],
+                      [0.45, 0.28, 0.22],
+                      [0.5, 0.32, 0.24],
+                      [0.47, 0.3, 0.22],
+                      [0.36, 0.22, 0.2]])
+
+
+def synthetic_hand(extended, tilt=0.0, scale=0.25, center=(0.5, 0.55), handedness="Right",
+                   noise=0.0, rng=None):
+    # extended: five bools (thumb first). tilt in degrees, scale in image widths per palm.
+    # Returns a (21, 3) float32 array as hands.process would report it.
+    rng = rng if rng is not None else np.random.default_rng()
+    local = np.zeros((NUM_LANDMARKS, 3))
+    for digit, base in enumerate(DIGIT_BASES):
+        position = np.array([*_BASE_POSITIONS[digit], 0.0])
+        local[base] = position
+        angle = _DIRECTIONS[digit]
+        # Straight digits keep their direction; curled ones bend at every joint, folding
+        # the tip down into the palm (and towards the camera)
+        bend = 0.0 if extended[digit] else (np.radians(50.0) if digit == 0 else np.radians(80.0))
+        pitch = 0.0
+        for joint, length in enumerate(_SEGMENTS[digit]):
+            if digit == 0:
+                angle += bend * 1.4
+            else:
+                pitch += bend
+            step = np.array([np.sin(angle) * np.cos(pitch), -np.cos(angle) * np.cos(pitch), -np.sin(pitch)])
+            position = position + length * step
+            local[base + joint + 1] = position
+
+    if noise:
+        local += rng.normal(scale=noise, size=local.shape)
+
+    # Left hands are the mirror image of right ones. In the mirrored selfie view a
+    # right hand's thumb points towards smaller x, which is how it is built.
+    if handedness == "Left":
+        local[:, 0] = -local[:, 0]
+
+    theta = np.radians(tilt)
+    rotation = np.array([[np.cos(theta), -np.sin(theta)], [np.sin(theta), np.cos(theta)]])
+    points = np.empty((NUM_LANDMARKS, 3), dtype=np.float32)
+    points[:, :2] = local[:, :2] @ rotation.T * scale + np.asarray(center)
+    points[:, 2] = local[:, 2] * scale
+    return points
+
+
+# Draws a hand for the (21, 3) landmarks of synthetic_hand into a BGR image, in
+# place: palm, forearm and digits as one silhouette, each digit a rounded stroke that
+# tapers towards its tip, shaded from the outline colour at the edges to the skin
+# colour inside. MediaPipe finds a flat cartoon hand without a forearm in only a few
+# poses; with the forearm and shading it reads poses with the thumb out (A 10000,
+# B 11000, C 11100, D 11110, open hand 11111) as drawn at around 0.16 image widths
+# per palm. Poses with the thumb folded over the palm are still not read reliably.
+# width is the digit thickness in palm widths.
+def render_hand(image, points, width=0.3, skin=(120, 150, 205), outline=(60, 80, 120)):
+    height, image_width = image.shape[:2]
+    pixels = points[:, :2] * (image_width, height)
+    palm_width = float(np.linalg.norm(pixels[5] - pixels[17])) / 0.73
+    thickness = palm_width * width
+
+    def point(xy):
+        return tuple(np.rint(xy).astype(int).tolist())
+
+    silhouette = np.zeros((height, image_width), dtype=np.uint8)
+    palm = cv2.convexHull(np.rint(pixels[[0, 1, 5, 9, 13, 17]]).astype(np.int32))
+    cv2.fillConvexPoly(silhouette, palm, 255, cv2.LINE_AA)
+    # The forearm continues from the wrist, away from the middle finger
+    wrist = pixels[0]
+    elbow = wrist - (pixels[9] - wrist) * 0.9
+    cv2.line(silhouette, point(wrist), point(elbow), 255, int(thickness * 2.6), cv2.LINE_AA)
+    # Thumb a little thicker, pinky thinner
+    digit_thickness = (1.2, 1.0, 1.05, 0.95, 0.8)
+    for digit, base in enumerate(DIGIT_BASES):
+        for joint in range(base, base + 3):
+            stroke = thickness * digit_thickness[digit] * (1.0 - 0.12 * (joint - base))
+            cv2.line(silhouette, point(pixels[joint]), point(pixels[joint + 1]), 255, max(int(stroke), 2),
+                     cv2.LINE_AA)
+
+    coverage = silhouette.astype(np.float32)[..., None] / 255.0
+    depth = cv2.distanceTransform((silhouette > 127).astype(np.uint8), cv2.DIST_L2, 5)
+    shade = np.clip(depth / max(thickness * 0.6, 1.0), 0.0, 1.0)[..., None]
+    color = np.float32(outline) * (1.0 - shade) + np.float32(skin) * shade
+    image[:] = (image * (1.0 - coverage) + color * coverage).astype(np.uint8)
+    return image
+
+
+# Gesture id for a pose, following detect_gesture: 1-4 extended digits are answers
+# 0-3 (A-D), anything else is -1 (no gesture)
+def gesture_label(extended):
+    count = int(np.count_nonzero(extended))
+    return count - 1 if 1 <= count <= 4 else -1
+
+
+# A labelled batch of random hands: returns (points (N, 21, 3), labels (N,), handedness
+# list). max_tilt bounds the random tilt in degrees; 0 gives upright hands only.
+def synthetic_dataset(count, max_tilt=35.0, left_share=0.3, noise=0.01, seed=0):
+    rng = np.random.default_rng(seed)
+    points = np.empty((count, NUM_LANDMARKS, 3), dtype=np.float32)
+    labels = np.empty(count, dtype=np.int64)
+    handedness = []
+    for i in range(count):
+        # Pick how many digits to show first, so every count is equally common
+        extended = np.zeros(5, dtype=bool)
+        extended[rng.choice(5, size=rng.integers(0, 6), replace=False)] = True
+        hand = "Left" if rng.random() < left_share else "Right"
+        points[i] = synthetic_hand(
+            extended,
+            tilt=rng.uniform(-max_tilt, max_tilt),
+            scale=rng.uniform(0.15, 0.35),
+            center=rng.uniform(0.3, 0.7, size=2),
+            handedness=hand,
+            noise=noise,
+            rng=rng)
+        labels[i] = gesture_label(extended)
+        handedness.append(hand)
+    return points, labels, handedness
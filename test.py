@@ -1,3 +1,4 @@
+import os
 import sys
 import sqlite3
 import hashlib
@@ -13,6 +14,12 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtGui import QFont, QIcon, QImage, QPixmap
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread
+from landmarks import (
+    WRIST, FINGER_TIPS, as_landmark_array, count_extended_fingers, handedness_labels
+)
+from swipe import SwipeDetector, SWIPE_LEFT, SWIPE_RIGHT
+from dtw_gestures import DynamicGestureMatcher, load_template_library
+import database
 
 # Initialize MediaPipe Hands
 mp_hands = mp.solutions.hands
@@ -21,56 +28,15 @@ hands = mp_hands.Hands(min_detection_confidence=0.7, min_tracking_confidence=0.7
 
 # Database Setup
 def initialize_database():
-    conn = sqlite3.connect('gestura.db')
-    cursor = conn.cursor()
-    
-    # Create tables if they don't exist
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        role TEXT NOT NULL
-    )
-    ''')
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS quizzes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        teacher_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        FOREIGN KEY (teacher_id) REFERENCES users (id)
-    )
-    ''')
-
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS questions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        quiz_id INTEGER NOT NULL,
-        question_text TEXT NOT NULL,
-        options TEXT NOT NULL,
-        correct_answer INTEGER NOT NULL,
-        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-    )
-    ''')
-    
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS results (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        student_id INTEGER NOT NULL,
-        quiz_id INTEGER NOT NULL,
-        score INTEGER NOT NULL,
-        total_questions INTEGER NOT NULL,
-        FOREIGN KEY (student_id) REFERENCES users (id),
-        FOREIGN KEY (quiz_id) REFERENCES quizzes (id)
-    )
-    ''')
-
-    conn.commit()
+    # Creates the tables on first start and applies any schema changes made since
+    # (see database.MIGRATIONS)
+    conn = get_db_connection()
+    database.migrate(conn)
     return conn
 
 def get_db_connection():
-    return sqlite3.connect('gestura.db')
+    # This thread's pooled connection; close() hands it back (see database.py)
+    return database.get_connection()
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
@@ -87,6 +53,12 @@ class VideoThread(QThread):
         self.gesture_cooldown = False
         self.last_gesture_time = 0
         self.cooldown_duration = 2  # seconds
+        # Wrist history for swipe detection, one per hand (keyed by handedness)
+        self.swipe_detectors = {}
+        # Navigation gestures recorded with record_gesture.py, matched per hand
+        self.gesture_templates = load_template_library(
+            os.environ.get("GESTURA_GESTURE_TEMPLATES", "gesture_templates"))
+        self.dynamic_gestures = {}
     
     def run(self):
         self.running = True
@@ -100,6 +72,7 @@ class VideoThread(QThread):
                 ret, frame = self.cap.read()
                 if not ret:
                     break
+                timestamp = time.monotonic()
                 
                 # Flip the frame horizontally for a later selfie-view display
                 frame = cv2.flip(frame, 1)
@@ -112,19 +85,20 @@ class VideoThread(QThread):
                 
                 # Draw hand landmarks on the frame
                 if results.multi_hand_landmarks:
-                    for hand_landmarks in results.multi_hand_landmarks:
+                    handedness = handedness_labels(results)
+                    for i, hand_landmarks in enumerate(results.multi_hand_landmarks):
                         mp_drawing.draw_landmarks(
                             frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
                         
-                        # Check if we can detect a gesture now
-                        current_time = time.time()
-                        if not self.gesture_cooldown or current_time - self.last_gesture_time > self.cooldown_duration:
-                            # Get gesture
-                            gesture = self.detect_gesture(hand_landmarks)
-                            if gesture is not None:
+                        # Classify every frame so the swipe detector sees every wrist
+                        # sample; the cooldown only holds back what is emitted
+                        gesture = self.detect_gesture(hand_landmarks, handedness[i] if i < len(handedness) else None,
+                                                      timestamp)
+                        if gesture is not None:
+                            if not self.gesture_cooldown or timestamp - self.last_gesture_time > self.cooldown_duration:
                                 self.gesture_detected.emit(gesture)
                                 self.gesture_cooldown = True
-                                self.last_gesture_time = current_time
+                                self.last_gesture_time = timestamp
                 
                 # Add help text
                 cv2.putText(frame, "Gestures: 1 finger (A), 2 fingers (B), 3 fingers (C), 4 fingers (D)", 
@@ -140,35 +114,32 @@ class VideoThread(QThread):
                 # Sleep to reduce CPU usage
                 self.msleep(30)
     
-    def detect_gesture(self, hand_landmarks):
-    # Keep existing finger count detection
-        extended_fingers = 0
-    
-    # Get finger tip and pip (middle joint) landmarks
-        tips = [hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_TIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_TIP]]
+    def detect_gesture(self, hand_landmarks, handedness=None, timestamp=None):
+    # Keep existing finger count detection, done in one vectorized pass over the (21, 3)
+    # landmark array; the thumb test follows the hand's handedness when it is known
+        points = as_landmark_array(hand_landmarks)
+        extended_fingers = int(count_extended_fingers(points, handedness))
     
-        pips = [hand_landmarks.landmark[mp_hands.HandLandmark.THUMB_IP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.INDEX_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.MIDDLE_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.RING_FINGER_PIP],
-                hand_landmarks.landmark[mp_hands.HandLandmark.PINKY_PIP]]
+    # Get finger tip and wrist landmarks
+        tips = points[FINGER_TIPS]
+        wrist = points[WRIST]
     
-    # Get wrist landmark
-        wrist = hand_landmarks.landmark[mp_hands.HandLandmark.WRIST]
+    # Every frame's wrist position goes into the swipe history, whatever else is detected
+        if timestamp is None:
+            timestamp = time.monotonic()
+        swipe_detector = self.swipe_detectors.get(handedness)
+        if swipe_detector is None:
+            swipe_detector = self.swipe_detectors[handedness] = SwipeDetector()
+        swipe = swipe_detector.update(timestamp, float(wrist[0]), float(wrist[1]))
+        matcher = self.dynamic_gestures.get(handedness)
+        if matcher is None:
+            matcher = self.dynamic_gestures[handedness] = DynamicGestureMatcher(self.gesture_templates)
+        template = matcher.update(timestamp, points)
     
-    # Check each finger (simplified for demo - just checking if tip is above pip on y-axis)
-    # For the thumb, check if it's to the side (x-axis)
-        for i in range(5):
-            if i == 0:  # Thumb
-                if tips[i].x < pips[i].x:  # For right hand
-                    extended_fingers += 1
-            else:  # Other fingers
-                if tips[i].y < pips[i].y:
-                    extended_fingers += 1
+    # Recorded navigation gestures, e.g. a circle for submit. Checked first: they are
+    # often made with 1-4 fingers up, and the matcher has already consumed the match
+        if template is not None:
+            return template.action
     
     # Map to answer choices (1-4 fingers = options A-D)
         if 1 <= extended_fingers <= 4:
@@ -176,25 +147,18 @@ class VideoThread(QThread):
     
     # NEW GESTURES: Add detection for thumbs up, swipe left, swipe right
     # Check for thumbs up (thumb extended, other fingers closed)
-        thumb_extended = tips[0].y < wrist.y  # Thumb is above wrist
-        fingers_closed = all(tips[i].y > wrist.y for i in range(1, 5))
+        thumb_extended = tips[0, 1] < wrist[1]  # Thumb is above wrist
+        fingers_closed = bool(np.all(tips[1:, 1] > wrist[1]))
     
         if thumb_extended and fingers_closed:
             return "submit"  # Thumbs up gesture
     
-    # Check for swipe left/right (hand movement)
-        if hasattr(self, 'prev_wrist_x'):
-            movement = wrist.x - self.prev_wrist_x
-        
-        # Threshold for detecting swipe
-            if movement < -0.05:  # Moved left
-                self.prev_wrist_x = wrist.x
-                return "prev"
-            elif movement > 0.05:  # Moved right
-                self.prev_wrist_x = wrist.x
-                return "next"
+    # Check for swipe left/right: enough wrist travel within a fixed time window
+        if swipe == SWIPE_LEFT:
+            return "prev"
+        elif swipe == SWIPE_RIGHT:
+            return "next"
     
-        self.prev_wrist_x = wrist.x
         return None  # No recognized gesture
 
     
@@ -612,9 +576,9 @@ class GestureQuizDialog(QDialog):
         
         q_id = self.questions[self.current_question_idx][0]
         
-        # Find selected option
+        # Find selected option; buttons beyond the question's options are hidden
         for i, opt in enumerate(self.option_buttons):
-            if opt.isChecked():
+            if opt.isChecked() and not opt.isHidden():
                 self.user_answers[q_id] = i
                 break
     
@@ -663,11 +627,17 @@ class GestureQuizDialog(QDialog):
             self.camera_view.width(), self.camera_view.height(), 
             Qt.KeepAspectRatio, Qt.SmoothTransformation))
     
+    def option_count(self):
+        # Imported questions may have 2 or 3 options; gestures for the others are ignored
+        if not self.questions:
+            return 0
+        return len(json.loads(self.questions[self.current_question_idx][2]))
+    
     def handle_gesture(self, gesture):
         if isinstance(gesture, int):  # Existing finger count gesture (0-3 for A-D)
             option_texts = ["A (Index finger)", "B (Two fingers)", "C (Three fingers)", "D (Four fingers)"]
         
-            if 0 <= gesture <= 3:
+            if 0 <= gesture < self.option_count():
                 self.gesture_status.setText(f"Detected: Option {option_texts[gesture]}")
                 self.gesture_status.setStyleSheet("font-size: 14px; font-weight: bold; color: green; padding: 5px;")
             
@@ -1137,6 +1107,7 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(database.pool.close_all)
     window = MainWindow()
     window.show()
     sys.exit(app.exec_())
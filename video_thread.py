@@ -0,0 +1,223 @@
+import os
+import time
+
+import cv2
+import mediapipe as mp
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from capture import CameraManager
+from governor import FrameRateGovernor
+from preview import FrameBufferPool, PreviewStream, LatestFrameDelivery
+from landmarks import LandmarkBuffer, as_landmark_array, finger_count_gesture, handedness_labels, handedness_scores
+from overlay import OverlayRenderer
+from hand_tracker import HandTrackerService
+from debounce import GestureDebouncer, COMMITTED
+from gesture_model import GestureModel
+from smoothing import LandmarkSmoother
+from recording import LandmarkRecorder
+from stage_timing import StageTimings
+from profiling import profile_thread
+
+# Stages of a frame that VideoThread times. "capture" is the read on the capture
+# thread and "queue" how old the frame was when the worker picked it up; the rest
+# are the worker's own steps, "emit" covering both the gesture signals and handing
+# over the preview frame.
+PIPELINE_STAGES = ("capture", "queue", "color", "flip", "inference", "classify", "record",
+                   "qimage", "draw", "emit")
+
+# Initialize MediaPipe Hands
+mp_hands = mp.solutions.hands
+
+# One hand tracking model for the whole process, loaded and warmed up after login
+# and leased to each gesture quiz in turn
+hand_tracker = HandTrackerService(lambda: mp_hands.Hands(
+    min_detection_confidence=0.7,
+    min_tracking_confidence=0.5))
+
+# The camera stays open for the whole login session and is only paused between quizzes.
+# GESTURA_SOURCE picks another frame source, e.g. a video file or "synthetic".
+camera_manager = CameraManager(os.environ.get("GESTURA_SOURCE", "0"))
+
+# Video processing thread class
+class VideoThread(QThread):
+    # Emitted once a gesture has been held long enough to select an answer
+    gesture_detected = pyqtSignal(int)
+    # Emitted while a gesture is building up, before it is committed
+    gesture_tentative = pyqtSignal(int)
+
+    def __init__(self, parent=None, source=None):
+        super().__init__(parent)
+        self.running = False
+        # Any FrameSource, opened just for this thread; by default the shared camera is used
+        self.source = source
+        self.camera = None
+        self.mailbox = None
+        # Paces the loop from measured work instead of a fixed sleep
+        self.governor = FrameRateGovernor()
+        # Reused RGB frame for inference; nothing outside this thread holds on to it
+        self.frame_buffers = FrameBufferPool(count=1)
+        # Preview frames are made at their own, lower rate and only while visible
+        self.preview = PreviewStream()
+        # The GUI only ever paints the newest preview frame; stale ones are dropped
+        self.frame_delivery = LatestFrameDelivery()
+        # Help text and skeletons drawn on the preview; GESTURA_OVERLAY=0 turns it off
+        self.overlay = OverlayRenderer(
+            "Gestures: 1 finger (A), 2 fingers (B), 3 fingers (C), 4 fingers (D)",
+            enabled=os.environ.get("GESTURA_OVERLAY", "1") != "0")
+        self.landmark_buffer = LandmarkBuffer()
+        # Optional temporal smoothing of the landmarks before classification:
+        # GESTURA_SMOOTHING=one_euro or ema, off by default
+        smoothing = os.environ.get("GESTURA_SMOOTHING", "off")
+        self.smoother = LandmarkSmoother(method=smoothing) if smoothing != "off" else None
+        # With GESTURA_RECORD_DIR set, every frame's landmarks are recorded for replay
+        self.record_dir = os.environ.get("GESTURA_RECORD_DIR")
+        self.recorder = None
+        # A trained landmark classifier (see gesture_model.py) replaces the finger
+        # counting rule when GESTURA_GESTURE_MODEL names a model file
+        model_path = os.environ.get("GESTURA_GESTURE_MODEL")
+        self.gesture_model = GestureModel.load(model_path) if model_path else None
+        # Commits a gesture once most of the recent frames agree on it, and re-arms
+        # when the pose changes; GESTURA_VOTE_WINDOW / GESTURA_VOTE_AGREEMENT tune it
+        self.debouncer = GestureDebouncer(
+            window=int(os.environ.get("GESTURA_VOTE_WINDOW", "6")),
+            agreement=float(os.environ.get("GESTURA_VOTE_AGREEMENT", "0.6")))
+        # Called on this thread with every CapturedFrame once it has been fully handled,
+        # e.g. by benchmark_pipeline.py to time frames end to end
+        self.frame_listener = None
+        # Per-stage timing histograms; read from the GUI thread for the timing overlay
+        self.timings = StageTimings(PIPELINE_STAGES)
+
+    @property
+    def frames_dropped(self):
+        # Frames the capture thread delivered that inference never got to see
+        return self.mailbox.dropped if self.mailbox else 0
+
+    @property
+    def frames_coalesced(self):
+        # Preview frames replaced by a newer one before the GUI got to paint them
+        return self.frame_delivery.coalesced
+
+    def start(self, *args):
+        # Set before the thread exists, so a stop() that comes in before run() starts still counts
+        self.running = True
+        super().start(*args)
+
+    def run(self):
+        if self.source is not None:
+            self.camera = CameraManager(source=self.source)
+        else:
+            self.camera = camera_manager
+
+        # Capture runs on its own thread and only ever keeps the latest frame,
+        # so a slow inference frame cannot make us fall behind the camera
+        self.mailbox = self.camera.resume()
+        if self.record_dir:
+            os.makedirs(self.record_dir, exist_ok=True)
+            self.recorder = LandmarkRecorder(os.path.join(
+                self.record_dir, time.strftime("session-%Y%m%d-%H%M%S.gstl")))
+        try:
+            # Python's profiler only follows the main thread; GESTURA_PROFILE profiles this one too
+            with profile_thread("video"):
+                self.process_frames()
+        finally:
+            if self.recorder is not None:
+                self.recorder.close()
+            if self.camera is camera_manager:
+                self.camera.pause()
+            else:
+                self.camera.close()
+
+    def process_frames(self):
+        # Waits for the background warm-up if it is still running
+        with hand_tracker.lease() as hands:
+            while self.running:
+                captured = self.mailbox.get(timeout=1.0)
+                if captured is None:
+                    if self.mailbox.closed:
+                        break
+                    continue
+                self.governor.frame_started()
+                timings = self.timings
+                timings.start()
+                timings.record("capture", captured.read_seconds)
+                timings.record("queue", max(0.0, time.monotonic() - captured.timestamp))
+
+                # Convert the BGR image to RGB straight into a reused buffer, then
+                # flip it in place for a selfie-view display; no new frame is allocated
+                rgb_frame, _ = self.frame_buffers.next(captured.image.shape)
+                cv2.cvtColor(captured.image, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+                timings.lap("color")
+                cv2.flip(rgb_frame, 1, dst=rgb_frame)
+                timings.lap("flip")
+
+                # Process the frame with MediaPipe Hands; a read-only array is passed by reference
+                rgb_frame.flags.writeable = False
+                results = hands.process(rgb_frame)
+                rgb_frame.flags.writeable = True
+                timings.lap("inference")
+
+                # Every later stage works on this (N, 21, 3) array instead of the protobufs
+                hand_points = self.landmark_buffer.fill(results.multi_hand_landmarks)
+                handedness = handedness_labels(results)
+                if self.recorder is not None:
+                    timings.lap("classify")
+                    self.recorder.write_frame(captured.frame_id, captured.timestamp, hand_points,
+                                              handedness, handedness_scores(results))
+                    timings.lap("record")
+                if self.smoother is not None:
+                    hand_points = self.smoother.smooth(hand_points, captured.timestamp, handedness)
+
+                # One vote per frame: the first hand that shows a recognised gesture
+                gesture = None
+                for i, points in enumerate(hand_points):
+                    gesture = self.detect_gesture(points, handedness[i] if i < len(handedness) else None)
+                    if gesture is not None:
+                        break
+                event = self.debouncer.update(gesture, captured.timestamp)
+                timings.lap("classify")
+                if event is not None:
+                    if event.kind == COMMITTED:
+                        self.gesture_detected.emit(event.gesture)
+                    else:
+                        self.gesture_tentative.emit(event.gesture)
+                    timings.lap("emit")
+
+                # Preview runs at its own rate, already sized for camera_view
+                now = time.monotonic()
+                if self.preview.due(now):
+                    preview_frame, preview_image = self.preview.render(rgb_frame, now)
+                    timings.lap("qimage")
+
+                    # Draw help text and hand landmarks on the small preview rather than the full frame
+                    self.overlay.draw(preview_frame, hand_points,
+                                      scale=preview_frame.shape[1] / rgb_frame.shape[1])
+                    timings.lap("draw")
+
+                    # Hand over the QImage that already wraps the preview buffer
+                    self.frame_delivery.post(preview_image)
+                    timings.lap("emit")
+                timings.finish()
+
+                if self.frame_listener is not None:
+                    self.frame_listener(captured)
+
+                # Sleep to stay within the CPU budget, or idle while no hand is in view
+                delay = self.governor.frame_finished(bool(results.multi_hand_landmarks))
+                if delay > 0:
+                    self.msleep(int(delay * 1000))
+
+    def detect_gesture(self, hand_landmarks, handedness=None):
+        if self.gesture_model is not None:
+            return self.gesture_model.classify(as_landmark_array(hand_landmarks), handedness)
+
+        # Count extended fingers in one vectorized pass over the (21, 3) landmark array;
+        # the thumb test follows the hand's handedness when it is known. 1-4 fingers
+        # map to options A-D (0-3), anything else is no gesture (None).
+        return finger_count_gesture(as_landmark_array(hand_landmarks), handedness)
+
+    def stop(self):
+        self.running = False
+        # The camera is only paused when run() returns; the capture thread owns the device
+        if self.mailbox:
+            self.mailbox.wake()
+        self.wait()